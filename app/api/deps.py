@@ -0,0 +1,129 @@
+"""API Dependencies - Lazily constructed service singletons"""
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Optional
+from fastapi import HTTPException
+
+if TYPE_CHECKING:
+    from app.services.llm_service import LLMService
+    from app.services.quota_service import QuotaService, QuotaStatus
+    from app.services.voice_service import VoiceService
+
+_lock = threading.Lock()
+_llm_service: Optional["LLMService"] = None
+_voice_service: Optional["VoiceService"] = None
+
+
+def shared_llm_service() -> "LLMService":
+    """
+    Get the shared LLM service, constructing it on first use.
+
+    Returns:
+        Process-wide LLMService instance
+    """
+    global _llm_service
+    if _llm_service is None:
+        with _lock:
+            if _llm_service is None:
+                from app.core.config import settings
+                from app.services.llm_service import LLMService
+                from app.services.speculation_service import SpeculationService
+
+                tts = speculative_speech if settings.SPECULATION_TTS else None
+                _llm_service = LLMService(speculation=SpeculationService(tts=tts))
+    return _llm_service
+
+
+def shared_voice_service() -> "VoiceService":
+    """
+    Get the shared voice service, constructing it on first use.
+
+    Returns:
+        Process-wide VoiceService instance
+    """
+    global _voice_service
+    if _voice_service is None:
+        with _lock:
+            if _voice_service is None:
+                from app.services.voice_service import VoiceService
+                _voice_service = VoiceService()
+    return _voice_service
+
+
+async def speculative_speech(text: str, user_id: str) -> None:
+    """Synthesize a speculated reply ahead of time, charged only if the user fetches it."""
+    await shared_voice_service().prepare_speech(text, user_id)
+
+
+async def finish_background_work() -> None:
+    """Wait for background work of the services built so far."""
+    if _llm_service is not None:
+        # Unused speculations are not worth delaying shutdown for
+        _llm_service.speculation.cancel_all()
+        await _llm_service.memory.wait_for_compactions()
+
+
+# Request dependencies are coroutines: FastAPI would otherwise run a plain
+# function dependency in the threadpool on every request.
+
+async def get_llm_service() -> "LLMService":
+    """Dependency providing the shared LLM service."""
+    return shared_llm_service()
+
+
+async def get_voice_service() -> "VoiceService":
+    """Dependency providing the shared voice service."""
+    return shared_voice_service()
+
+
+async def get_quota_service() -> "QuotaService":
+    """Dependency providing the shared quota service."""
+    from app.services.quota_service import get_quota_service as shared_quota_service
+
+    return shared_quota_service()
+
+
+async def enforce_quota(quotas: "QuotaService", user_id: str) -> "QuotaStatus":
+    """
+    Reject the request if the user has used up their budget.
+
+    Args:
+        quotas: Quota service
+        user_id: User identifier
+
+    Returns:
+        The user's current QuotaStatus
+
+    Raises:
+        HTTPException: 429 with Retry-After when over quota
+    """
+    status = await quotas.check(user_id)
+    if not quotas.is_allowed(status):
+        raise HTTPException(
+            status_code=429, detail="Usage quota exceeded", headers=status.headers()
+        )
+    return status
+
+
+async def warm_up() -> None:
+    """Construct all services ahead of the first request."""
+    from app.services.quota_service import get_quota_service as shared_quota_service
+
+    # Construction imports heavy modules and opens databases; keep it off the loop
+    await asyncio.to_thread(build_services)
+    await shared_quota_service().restore()
+
+
+def build_services() -> None:
+    """Construct the shared services and the stores they depend on."""
+    from app.db.session import init_db
+    from app.db.state_store import get_state_store
+    from app.prompts.templates import get_prompt_registry
+    from app.services.quota_service import get_quota_service as shared_quota_service
+
+    get_prompt_registry()
+    get_state_store()
+    init_db()
+    shared_quota_service()
+    shared_llm_service()
+    shared_voice_service()
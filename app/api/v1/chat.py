@@ -1,29 +1,44 @@
 """Chat API Endpoints"""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from app.api.deps import enforce_quota, get_llm_service, get_quota_service
 from app.models.chat import ChatRequest, ChatResponse
-from app.services.llm_service import LLMService
 from app.core.logging import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
-llm_service = LLMService()
 
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest) -> ChatResponse:
+# ChatResponse is documented via `responses` rather than `response_model` so
+# the already-validated model is rendered once with model_dump_json instead of
+# being re-validated and passed through jsonable_encoder.
+@router.post("/chat", response_model=None, responses={200: {"model": ChatResponse}})
+async def chat(
+    request: ChatRequest,
+    llm_service=Depends(get_llm_service),
+    quotas=Depends(get_quota_service),
+) -> Response:
     """
     Process a chat request and return a response from the Griot AI.
     
     Args:
         request: Chat request containing user message and optional context
+        llm_service: Shared LLM service
+        quotas: Shared quota service
         
     Returns:
-        ChatResponse with the AI's response
+        ChatResponse with the AI's response, rendered as JSON, with the
+        user's remaining budget in X-Quota-Remaining-* headers
     """
+    await enforce_quota(quotas, request.user_id)
     try:
         logger.info(f"Chat request from user: {request.user_id}")
         response = await llm_service.generate_response(request)
-        return response
+        status = await quotas.check(request.user_id)
+        return Response(
+            content=response.model_dump_json(),
+            media_type="application/json",
+            headers=status.headers()
+        )
     except Exception as e:
         logger.error(f"Error processing chat request: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,6 +1,9 @@
 """Health Check Endpoints"""
-from fastapi import APIRouter
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, Request, Response
 from pydantic import BaseModel
+from app.api.deps import get_llm_service
+from app.core.metrics import metrics
 
 router = APIRouter()
 
@@ -11,6 +14,11 @@ class HealthResponse(BaseModel):
     version: str
 
 
+class ReadinessResponse(BaseModel):
+    """Readiness check response model."""
+    ready: bool
+
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check() -> HealthResponse:
     """
@@ -20,3 +28,45 @@ async def health_check() -> HealthResponse:
         HealthResponse with status information
     """
     return HealthResponse(status="healthy", version="0.1.0")
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness_check(request: Request, response: Response) -> ReadinessResponse:
+    """
+    Readiness check endpoint to verify the service can take traffic.
+    
+    Unlike /health (liveness), this fails with 503 until services have been
+    built at startup, and again as soon as the instance starts draining.
+    
+    Returns:
+        ReadinessResponse with readiness status
+    """
+    ready = request.app.state.lifecycle.ready
+    if not ready:
+        response.status_code = 503
+    return ReadinessResponse(ready=ready)
+
+
+@router.get("/metrics")
+async def get_metrics() -> Dict[str, float]:
+    """
+    Expose in-process service metrics.
+    
+    Returns:
+        Mapping of metric name to value
+    """
+    return metrics.snapshot()
+
+
+@router.get("/metrics/routing")
+async def get_routing_decisions(llm_service=Depends(get_llm_service)) -> List[Dict[str, Any]]:
+    """
+    Expose the model router's most recent decisions.
+    
+    Args:
+        llm_service: Shared LLM service
+        
+    Returns:
+        Recent routing decisions, oldest first
+    """
+    return llm_service.router.recent_decisions()
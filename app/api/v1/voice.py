@@ -1,21 +1,151 @@
 """Voice API Endpoints - Speech Input/Output"""
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, Header, Query, Request, UploadFile, File, HTTPException
 from fastapi.responses import StreamingResponse
-import io
 
-from app.services.voice_service import VoiceService
-from app.services.llm_service import LLMService
+from app.api.deps import enforce_quota, get_llm_service, get_quota_service, get_voice_service
+from app.core.config import settings
 from app.models.chat import ChatRequest, ChatResponse
+from app.services.quota_service import QuotaService
+from app.services.transcode_service import AudioProfile, ProfileUnavailable, select_profile
 from app.core.logging import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
-voice_service = VoiceService()
-llm_service = LLMService()
+
+# Voice requests that do not identify a user are charged to their client
+# address under this prefix, so each anonymous client has a budget of its own
+ANONYMOUS_PREFIX = "anonymous:"
+
+FORMAT_DESCRIPTION = (
+    "Audio output profile (mp3, mp3_128k, mp3_64k, mp3_32k, opus_24k, opus_16k, pcm_16k). "
+    "Overrides the Accept header."
+)
+
+
+def get_audio_profile(
+    format: Optional[str] = Query(default=None, description=FORMAT_DESCRIPTION),
+    accept: Optional[str] = Header(default=None),
+    voice_service=Depends(get_voice_service),
+) -> AudioProfile:
+    """
+    Resolve the requested audio output profile.
+    
+    Without ffmpeg, only the MP3 pass-through can be produced: transcoded
+    profiles are skipped when negotiating the Accept header and rejected with
+    406 when requested by name.
+    
+    Args:
+        format: Explicit profile name
+        accept: Accept header
+        voice_service: Shared voice service, whose transcoder must be available
+        
+    Returns:
+        Selected AudioProfile
+    """
+    try:
+        return select_profile(format, accept, voice_service.transcoder.available)
+    except ProfileUnavailable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def transcript_message(transcript: str) -> str:
+    """
+    Turn a transcript into a chat message.
+    
+    Whisper transcribes silence as an empty string, and long recordings can
+    exceed the chat message limit; both are rejected as client errors.
+    
+    Args:
+        transcript: Transcribed speech
+        
+    Returns:
+        Message to send to Griot
+        
+    Raises:
+        HTTPException: 422 if the transcript is empty or too long
+    """
+    message = transcript.strip()
+    if not message:
+        raise HTTPException(status_code=422, detail="No speech detected in the audio")
+    if len(message) > settings.CHAT_MAX_MESSAGE_CHARS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Transcript exceeds {settings.CHAT_MAX_MESSAGE_CHARS} characters"
+        )
+    return message
+
+
+def get_voice_user(
+    request: Request,
+    user_id: Optional[str] = Query(default=None, min_length=1, max_length=128),
+) -> str:
+    """
+    Resolve the user charged with a voice request.
+    
+    Args:
+        request: Incoming request
+        user_id: User identifier sent by the client
+        
+    Returns:
+        The given user_id, or the client address under ANONYMOUS_PREFIX
+    """
+    if user_id is not None:
+        return user_id
+    host = request.client.host if request.client else "unknown"
+    return f"{ANONYMOUS_PREFIX}{host}"
+
+
+async def audio_response(chunks: AsyncIterator[bytes], profile: AudioProfile,
+                         quotas: QuotaService, user_id: str) -> StreamingResponse:
+    """
+    Stream encoded audio to the client.
+    
+    The first chunk is produced before the response starts so that synthesis
+    and encoder failures are still reported as errors rather than truncated audio.
+    Synthesis is charged before the first chunk is produced, so the remaining
+    budget reported in the headers already includes it.
+    
+    Args:
+        chunks: Encoded audio chunks
+        profile: Profile the audio is encoded with
+        quotas: Quota service reporting the remaining budget
+        user_id: User charged with the audio
+        
+    Returns:
+        Streaming audio response
+    """
+    first = await chunks.__anext__()
+    headers = (await quotas.check(user_id)).headers()
+    
+    async def body() -> AsyncIterator[bytes]:
+        yield first
+        async for chunk in chunks:
+            yield chunk
+    
+    return StreamingResponse(
+        body(),
+        media_type=profile.media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename=griot_response.{profile.extension}",
+            "Vary": "Accept",
+            **headers,
+        }
+    )
 
 
 @router.post("/voice")
-async def voice_interaction(audio: UploadFile = File(...)):
+async def voice_interaction(
+    audio: UploadFile = File(...),
+    user_id: str = Depends(get_voice_user),
+    conversation_id: Optional[str] = Query(default=None, max_length=128),
+    profile: AudioProfile = Depends(get_audio_profile),
+    voice_service=Depends(get_voice_service),
+    llm_service=Depends(get_llm_service),
+    quotas=Depends(get_quota_service),
+):
     """
     Listen to voice input, process it, and respond with voice output.
     
@@ -27,10 +157,17 @@ async def voice_interaction(audio: UploadFile = File(...)):
     
     Args:
         audio: Audio file (mp3, wav, m4a, etc.)
+        user_id: User charged with the interaction's usage (the client address if omitted)
+        conversation_id: Optional conversation the spoken turn continues
+        profile: Audio output profile (from ``format`` or the Accept header)
+        voice_service: Shared voice service
+        llm_service: Shared LLM service
+        quotas: Shared quota service
         
     Returns:
-        Audio response from Griot (MP3)
+        Audio response from Griot in the requested profile (MP3 by default)
     """
+    await enforce_quota(quotas, user_id)
     try:
         # Read audio file
         logger.info(f"Received audio file: {audio.filename}")
@@ -38,56 +175,71 @@ async def voice_interaction(audio: UploadFile = File(...)):
         
         # Convert speech to text
         logger.info("Transcribing speech...")
-        user_message = await voice_service.speech_to_text(audio_bytes)
+        user_message = await voice_service.speech_to_text(audio_bytes, user_id)
         logger.info(f"User said: {user_message}")
         
         # Generate Griot response
         logger.info("Generating response...")
         chat_request = ChatRequest(
-            user_id="voice_user",
-            message=user_message
+            user_id=user_id,
+            message=transcript_message(user_message),
+            conversation_id=conversation_id
         )
         response = await llm_service.generate_response(chat_request)
         logger.info(f"Generated response: {response.message[:100]}...")
         
         # Convert response to speech
         logger.info("Converting response to speech...")
-        audio_response = await voice_service.text_to_speech(
-            response.message,
-            voice="nova"  # Griot's voice
-        )
-        
-        return StreamingResponse(
-            io.BytesIO(audio_response),
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": "attachment; filename=griot_response.mp3"}
+        return await audio_response(
+            voice_service.stream_speech(
+                response.message,
+                voice="nova",  # Griot's voice
+                profile=profile,
+                user_id=user_id
+            ),
+            profile,
+            quotas,
+            user_id
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in voice interaction: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/voice/text")
-async def text_to_speech_only(text: str, voice: str = "nova"):
+async def text_to_speech_only(
+    text: str,
+    voice: str = "nova",
+    user_id: str = Depends(get_voice_user),
+    profile: AudioProfile = Depends(get_audio_profile),
+    voice_service=Depends(get_voice_service),
+    quotas=Depends(get_quota_service),
+):
     """
     Convert text to speech without speech recognition.
     
     Args:
         text: Text to convert to speech
         voice: Voice to use (alloy, echo, fable, onyx, nova, shimmer)
+        user_id: User charged with synthesized audio (the client address if omitted)
+        profile: Audio output profile (from ``format`` or the Accept header)
+        voice_service: Shared voice service
+        quotas: Shared quota service
         
     Returns:
-        Audio response (MP3)
+        Audio response in the requested profile (MP3 by default)
     """
+    await enforce_quota(quotas, user_id)
     try:
         logger.info(f"Converting text to speech: {text[:50]}...")
-        audio_response = await voice_service.text_to_speech(text, voice)
-        
-        return StreamingResponse(
-            io.BytesIO(audio_response),
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": "attachment; filename=griot_response.mp3"}
+        return await audio_response(
+            voice_service.stream_speech(text, voice, profile, user_id),
+            profile,
+            quotas,
+            user_id
         )
     except Exception as e:
         logger.error(f"Error converting text to speech: {str(e)}")
@@ -14,9 +14,73 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4")
     
+    # Model Routing Settings
+    OPENAI_FAST_MODEL: str = os.getenv("OPENAI_FAST_MODEL", "gpt-3.5-turbo")
+    ROUTER_ENABLED: bool = os.getenv("ROUTER_ENABLED", "True").lower() == "true"
+    ROUTER_SHORT_MESSAGE_CHARS: int = int(os.getenv("ROUTER_SHORT_MESSAGE_CHARS", "200"))
+    ROUTER_FAST_MAX_TOKENS: int = int(os.getenv("ROUTER_FAST_MAX_TOKENS", "600"))
+    ROUTER_MAX_ERROR_RATE: float = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5"))
+    ROUTER_MAX_BASE_LATENCY_MS: float = float(os.getenv("ROUTER_MAX_BASE_LATENCY_MS", "5000"))
+    ROUTER_MAX_MS_PER_TOKEN: float = float(os.getenv("ROUTER_MAX_MS_PER_TOKEN", "50"))
+    
+    # Request Limits (checked before the body is parsed)
+    MAX_JSON_BODY_BYTES: int = int(os.getenv("MAX_JSON_BODY_BYTES", str(32 * 1024)))
+    MAX_UPLOAD_BYTES: int = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+    CHAT_MAX_MESSAGE_CHARS: int = int(os.getenv("CHAT_MAX_MESSAGE_CHARS", "4000"))
+    
     # Database Settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./griot.db")
     
+    # Shared State Settings (caches, short-term memory, counters)
+    # "memory" keeps state per process; "sqlite" shares it across local workers
+    STATE_BACKEND: str = os.getenv("STATE_BACKEND", "memory")
+    STATE_DB_PATH: str = os.getenv("STATE_DB_PATH", "./griot_state.db")
+    
+    # Traffic Recording and Replay
+    # Append request records to this JSON-lines file (empty disables recording)
+    RECORDER_PATH: str = os.getenv("RECORDER_PATH", "")
+    RECORDER_REDACT: bool = os.getenv("RECORDER_REDACT", "True").lower() == "true"
+    RECORDER_SAMPLE_RATE: float = float(os.getenv("RECORDER_SAMPLE_RATE", "1.0"))
+    # Replace OpenAI with a stub reproducing recorded latencies (replay only)
+    UPSTREAM_STUB: bool = os.getenv("UPSTREAM_STUB", "False").lower() == "true"
+    UPSTREAM_STUB_LATENCY_MS: float = float(os.getenv("UPSTREAM_STUB_LATENCY_MS", "0"))
+    
+    # Graceful Shutdown
+    # In-flight requests get this long to finish before they are cancelled
+    SHUTDOWN_DRAIN_SECONDS: float = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "20"))
+    
+    # Conversation Memory Settings
+    # Older turns are summarized once unsummarized turns exceed this estimate
+    COMPACTION_TRIGGER_TOKENS: int = int(os.getenv("COMPACTION_TRIGGER_TOKENS", "3000"))
+    COMPACTION_KEEP_RECENT_TURNS: int = int(os.getenv("COMPACTION_KEEP_RECENT_TURNS", "6"))
+    MAX_CONVERSATION_TURNS: int = int(os.getenv("MAX_CONVERSATION_TURNS", "200"))
+    
+    # Speculative Follow-ups
+    # Precompute replies to "tell me more" style follow-ups after a story
+    SPECULATION_ENABLED: bool = os.getenv("SPECULATION_ENABLED", "False").lower() == "true"
+    SPECULATION_MAX_FOLLOW_UPS: int = int(os.getenv("SPECULATION_MAX_FOLLOW_UPS", "1"))
+    SPECULATION_USER_TOKENS_PER_HOUR: int = int(
+        os.getenv("SPECULATION_USER_TOKENS_PER_HOUR", "20000")
+    )
+    SPECULATION_CONCURRENCY: int = int(os.getenv("SPECULATION_CONCURRENCY", "4"))
+    SPECULATION_TTL_SECONDS: int = int(os.getenv("SPECULATION_TTL_SECONDS", "600"))
+    SPECULATION_TTS: bool = os.getenv("SPECULATION_TTS", "False").lower() == "true"
+    
+    # Usage Quotas (sliding window per user)
+    QUOTA_ENABLED: bool = os.getenv("QUOTA_ENABLED", "True").lower() == "true"
+    QUOTA_WINDOW_SECONDS: int = int(os.getenv("QUOTA_WINDOW_SECONDS", "3600"))
+    QUOTA_BUCKETS: int = int(os.getenv("QUOTA_BUCKETS", "12"))
+    QUOTA_MAX_TOKENS: int = int(os.getenv("QUOTA_MAX_TOKENS", "200000"))
+    QUOTA_MAX_AUDIO_SECONDS: int = int(os.getenv("QUOTA_MAX_AUDIO_SECONDS", "1800"))
+    QUOTA_FLUSH_SECONDS: int = int(os.getenv("QUOTA_FLUSH_SECONDS", "30"))
+    
+    # Audio Output Settings
+    FFMPEG_PATH: str = os.getenv("FFMPEG_PATH", "ffmpeg")
+    # Maximum concurrent encoder processes (0 = one per CPU core)
+    TRANSCODE_WORKERS: int = int(os.getenv("TRANSCODE_WORKERS", "0"))
+    TTS_CACHE_TTL_SECONDS: int = int(os.getenv("TTS_CACHE_TTL_SECONDS", "3600"))
+    TTS_CACHE_MAX_BYTES: int = int(os.getenv("TTS_CACHE_MAX_BYTES", str(2 * 1024 * 1024)))
+    
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
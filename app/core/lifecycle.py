@@ -0,0 +1,216 @@
+"""Application Lifecycle - In-flight tracking, draining and graceful shutdown
+
+Shutdown happens in three steps:
+
+1. Readiness flips to failing so load balancers stop routing new traffic.
+   Requests that still arrive are served, with ``Connection: close``.
+2. In-flight requests get until the drain deadline to finish; any left over are
+   cancelled, which aborts their upstream calls.
+3. Background tasks are stopped and shutdown hooks flush pending state.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+
+logger = get_logger(__name__)
+
+# Time given to cancelled requests and shutdown hooks after the drain deadline
+CANCEL_GRACE_SECONDS = 5.0
+
+ShutdownHook = Callable[[], Awaitable[None]]
+
+# Lifecycles of applications that are currently started in this process
+_running: Set["Lifecycle"] = set()
+
+
+class Lifecycle:
+    """Tracks in-flight requests and background tasks of one application."""
+
+    def __init__(self, drain_seconds: float = settings.SHUTDOWN_DRAIN_SECONDS):
+        """
+        Initialize a lifecycle.
+
+        Args:
+            drain_seconds: Deadline for in-flight requests once draining starts
+        """
+        self.drain_seconds = drain_seconds
+        self.ready = False
+        self.draining = False
+        self._requests: Set[asyncio.Task] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._hooks: List[Tuple[str, ShutdownHook]] = []
+        self._idle: Optional[asyncio.Event] = None
+        self._drained: Optional[asyncio.Task] = None
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently being served."""
+        return len(self._requests)
+
+    def started(self) -> None:
+        """Mark the application as started (not yet ready)."""
+        self.draining = False
+        self._drained = None
+        self._idle = asyncio.Event()
+        self._idle.set()
+        _running.add(self)
+
+    def spawn(self, coro: Awaitable, name: str) -> asyncio.Task:
+        """
+        Run a background task that is cancelled at shutdown.
+
+        Args:
+            coro: Coroutine to run
+            name: Task name used in logs
+
+        Returns:
+            The created task
+        """
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def on_shutdown(self, name: str, hook: ShutdownHook) -> None:
+        """
+        Register a coroutine run at shutdown, after requests are drained.
+
+        Hooks run in registration order; a failing hook does not stop the rest.
+
+        Args:
+            name: Hook name used in logs
+            hook: Coroutine function flushing pending state
+        """
+        self._hooks.append((name, hook))
+
+    def request_started(self, task: asyncio.Task) -> None:
+        """Track a request served by the given task."""
+        self._requests.add(task)
+        if self._idle is not None:
+            self._idle.clear()
+
+    def request_finished(self, task: asyncio.Task) -> None:
+        """Stop tracking a request."""
+        self._requests.discard(task)
+        if not self._requests and self._idle is not None:
+            self._idle.set()
+
+    async def drain(self) -> int:
+        """
+        Stop reporting ready and wait for in-flight requests.
+
+        Requests still running at the deadline are cancelled. Calling drain
+        again while (or after) draining waits for the same drain.
+
+        Returns:
+            Number of requests that had to be cancelled
+        """
+        if self._drained is None:
+            self.ready = False
+            self.draining = True
+            self._drained = asyncio.ensure_future(self._drain())
+        return await asyncio.shield(self._drained)
+
+    async def shutdown(self) -> None:
+        """Drain requests, stop background tasks and run shutdown hooks."""
+        start = time.monotonic()
+        await self.drain()
+
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=CANCEL_GRACE_SECONDS)
+
+        for name, hook in self._hooks:
+            remaining = self.drain_seconds - (time.monotonic() - start)
+            try:
+                await asyncio.wait_for(hook(), timeout=max(remaining, CANCEL_GRACE_SECONDS))
+            except Exception as e:
+                logger.error(f"Shutdown hook {name} failed: {str(e)}")
+        _running.discard(self)
+        logger.info(f"Shutdown completed in {time.monotonic() - start:.2f}s")
+
+    async def _drain(self) -> int:
+        """Wait for requests up to the deadline, then cancel the rest."""
+        logger.info(f"Draining {self.in_flight} in-flight requests")
+        if self._idle is not None and self._requests:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=self.drain_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+        pending = list(self._requests)
+        if pending:
+            logger.warning(f"Cancelling {len(pending)} requests after the drain deadline")
+            metrics.incr("shutdown.cancelled_requests", len(pending))
+            for task in pending:
+                task.cancel()
+            await asyncio.wait(pending, timeout=CANCEL_GRACE_SECONDS)
+        return len(pending)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        """Forget a finished background task, logging its failure."""
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background task {task.get_name()} failed: {str(task.exception())}")
+
+
+async def drain_running() -> None:
+    """Drain every started application in this process."""
+    if _running:
+        await asyncio.gather(*(lifecycle.drain() for lifecycle in list(_running)))
+
+
+class InFlightMiddleware:
+    """ASGI middleware registering each HTTP request with the lifecycle.
+
+    While draining, responses carry ``Connection: close`` so that keep-alive
+    clients reconnect to an instance that is still ready. Requests cancelled
+    at the drain deadline before responding get a 503 the client can retry.
+    """
+
+    def __init__(self, app: ASGIApp, lifecycle: Lifecycle):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            lifecycle: Lifecycle tracking the requests
+        """
+        self.app = app
+        self.lifecycle = lifecycle
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                if self.lifecycle.draining:
+                    message["headers"] = [*message.get("headers", []), (b"connection", b"close")]
+            await send(message)
+
+        task = asyncio.current_task()
+        self.lifecycle.request_started(task)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except asyncio.CancelledError:
+            if self.lifecycle.draining and not response_started:
+                await send({
+                    "type": "http.response.start",
+                    "status": 503,
+                    "headers": [(b"retry-after", b"1"), (b"connection", b"close")],
+                })
+                await send({"type": "http.response.body", "body": b""})
+            raise
+        finally:
+            self.lifecycle.request_finished(task)
@@ -0,0 +1,106 @@
+"""Request Size Limits - Reject oversized bodies before they are parsed"""
+from typing import Optional
+from starlette.exceptions import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class PayloadTooLarge(HTTPException):
+    """Raised when a streamed request body exceeds its limit.
+
+    Being an HTTPException, it passes through body parsing and is rendered as
+    a 413 by the application's exception handlers.
+    """
+
+    def __init__(self):
+        super().__init__(status_code=413, detail="Request body too large")
+
+
+class BodySizeLimitMiddleware:
+    """ASGI middleware enforcing per-content-type request body limits.
+
+    Multipart bodies (audio uploads) get a large limit and everything else a
+    small one: FastAPI parses a body without a Content-Type (or with any
+    non-form type) as JSON, so only uploads may be big. Requests that declare
+    an oversized Content-Length are rejected without reading the body; bodies
+    without a length are counted as they stream in.
+    """
+
+    def __init__(self, app: ASGIApp, max_json_bytes: int, max_upload_bytes: int):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            max_json_bytes: Limit for all bodies but uploads
+            max_upload_bytes: Limit for multipart/form-data uploads
+        """
+        self.app = app
+        self.max_json_bytes = max_json_bytes
+        self.max_upload_bytes = max_upload_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+        is_upload = content_type.startswith("multipart/")
+        limit = self.max_upload_bytes if is_upload else self.max_json_bytes
+
+        declared = _content_length(headers.get(b"content-length"))
+        if declared is not None and declared > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise PayloadTooLarge()
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except PayloadTooLarge:
+            if not response_started:
+                await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send: Send, limit: int) -> None:
+        """Send a 413 response."""
+        logger.warning(f"Rejected request body larger than {limit} bytes")
+        body = b'{"detail":"Request body too large"}'
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def _content_length(value: Optional[bytes]) -> Optional[int]:
+    """Parse a Content-Length header value."""
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
@@ -0,0 +1,90 @@
+"""In-process Metrics - Counters for service-level observability"""
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+
+
+class Metrics:
+    """Thread-safe registry of named counters and derived ratios."""
+
+    def __init__(self):
+        """Initialize an empty metrics registry."""
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._ratios: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def register_ratio(self, name: str, numerator: str, denominator: str) -> None:
+        """
+        Register a derived ratio reported alongside the counters.
+
+        Args:
+            name: Name of the derived metric
+            numerator: Counter name for the numerator
+            denominator: Counter name for the denominator
+        """
+        with self._lock:
+            self._ratios[name] = (numerator, denominator)
+
+    def incr(self, name: str, value: float = 1.0) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name: Counter name
+            value: Amount to add
+        """
+        with self._lock:
+            self._counters[name] += value
+
+    def get(self, name: str) -> float:
+        """
+        Get the current value of a counter.
+
+        Args:
+            name: Counter name
+
+        Returns:
+            Counter value (0 if never incremented)
+        """
+        with self._lock:
+            return self._counters.get(name, 0.0)
+
+    def ratio(self, numerator: str, denominator: str) -> float:
+        """
+        Compute the ratio between two counters.
+
+        Args:
+            numerator: Counter name for the numerator
+            denominator: Counter name for the denominator
+
+        Returns:
+            numerator / denominator, or 0.0 when the denominator is zero
+        """
+        with self._lock:
+            total = self._counters.get(denominator, 0.0)
+            if not total:
+                return 0.0
+            return self._counters.get(numerator, 0.0) / total
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Get a copy of all counters plus derived rates.
+
+        Returns:
+            Mapping of metric name to value
+        """
+        with self._lock:
+            data = dict(self._counters)
+            ratios = dict(self._ratios)
+        for name, (numerator, denominator) in ratios.items():
+            total = data.get(denominator, 0.0)
+            data[name] = data.get(numerator, 0.0) / total if total else 0.0
+        return data
+
+    def reset(self) -> None:
+        """Clear all counters."""
+        with self._lock:
+            self._counters.clear()
+
+
+metrics = Metrics()
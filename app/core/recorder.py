@@ -0,0 +1,339 @@
+"""Traffic Recorder - Append-only request logs for offline replay
+
+Each recorded request is one JSON line:
+
+    {"ts": 1700000000.123, "method": "POST", "path": "/api/v1/chat", "query": "",
+     "ctype": "application/json", "size": 81, "body": {...}, "status": 200,
+     "ms": 912.4, "resp": 1533, "up": [{"n": "chat", "ms": 880.1, "model": "gpt-4",
+     "pt": 412, "ct": 256}]}
+
+``up`` lists the upstream calls made while serving the request with their
+latencies, so a replay can reproduce them against a stubbed upstream (see
+``app/services/upstream_stub.py`` and ``benchmarks/replay.py``).
+
+Work a request leaves running in the background (speculation, conversation
+summaries) is recorded separately once it finishes, as ``{"ts": ..., "bg": true,
+"ms": ..., "up": [...]}``. A replay regenerates it from the replayed requests.
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, List, Optional, TypeVar
+from urllib.parse import parse_qsl, urlencode
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Header carrying the recorded upstream calls of a replayed request
+REPLAY_HEADER = "x-replay-upstream"
+
+# Probe and metrics endpoints are not part of the traffic shape
+SKIPPED_PATHS = {"/api/v1/health", "/api/v1/ready", "/api/v1/metrics", "/api/v1/metrics/routing"}
+
+# Identifiers are hashed so per-user and per-conversation patterns survive
+HASHED_FIELDS = {"user_id", "conversation_id"}
+# Free text is replaced by a placeholder of the same length
+MASKED_FIELDS = {"message", "text"}
+
+# JSON bodies larger than this are recorded by size only
+MAX_RECORDED_BODY_BYTES = 64 * 1024
+
+# Upstream calls made by the current request (None when not recording)
+_upstream_calls: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar(
+    "upstream_calls", default=None
+)
+# Recorded upstream calls still to be reproduced for the current replayed request
+_replay_plan: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("replay_plan", default=None)
+# Recorder of the current request, used for the background work it starts
+_recorder: ContextVar[Optional["TrafficRecorder"]] = ContextVar("recorder", default=None)
+
+T = TypeVar("T")
+
+
+def record_upstream(name: str, started: float, **fields: Any) -> None:
+    """
+    Record an upstream call made by the current request.
+
+    Args:
+        name: Call name, e.g. ``chat`` or ``speech``
+        started: ``time.perf_counter()`` value taken before the call
+        **fields: Extra details (model, token counts, sizes)
+    """
+    calls = _upstream_calls.get()
+    if calls is not None:
+        calls.append({"n": name, "ms": round((time.perf_counter() - started) * 1000, 1), **fields})
+
+
+def record_upstream_failure(name: str, started: float, error: Exception, **fields: Any) -> None:
+    """
+    Record a failed upstream call made by the current request.
+
+    The call is marked ``"ok": false`` with the upstream HTTP status, if any,
+    so that a replay fails it the same way.
+
+    Args:
+        name: Call name
+        started: ``time.perf_counter()`` value taken before the call
+        error: Exception raised by the call
+        **fields: Extra details
+    """
+    record_upstream(name, started, ok=False, status=getattr(error, "status_code", None), **fields)
+
+
+def next_replayed_call(name: str) -> Optional[Dict[str, Any]]:
+    """
+    Take the next recorded upstream call with the given name.
+
+    Args:
+        name: Call name
+
+    Returns:
+        The recorded call, or None outside a replay (or once exhausted)
+    """
+    plan = _replay_plan.get()
+    if plan:
+        for index, call in enumerate(plan):
+            if call.get("n") == name:
+                return plan.pop(index)
+    return None
+
+
+async def detached(work: Awaitable[T]) -> T:
+    """
+    Run background work started by a request outside of the request's context.
+
+    Wrap the work when creating its task, e.g.
+    ``asyncio.create_task(detached(self.compact(...)))``. A task inherits the
+    context of the request that created it, so its upstream calls would
+    otherwise land in the request's record (or be lost once that is written)
+    and, in a replay, take calls planned for the request. Detached work gets
+    a background record of its own and the stub's default latency.
+
+    Args:
+        work: Coroutine to run
+
+    Returns:
+        The coroutine's result
+    """
+    recorder = _recorder.get()
+    calls: Optional[List[Dict[str, Any]]] = [] if recorder is not None else None
+    # The task runs in a copy of the request's context, so these stay local to it
+    _upstream_calls.set(calls)
+    _replay_plan.set(None)
+    _recorder.set(None)
+    wall = time.time()
+    start = time.perf_counter()
+    try:
+        return await work
+    finally:
+        if recorder is not None and calls:
+            try:
+                recorder.write({
+                    "ts": round(wall, 3),
+                    "bg": True,
+                    "ms": round((time.perf_counter() - start) * 1000, 1),
+                    "up": calls,
+                })
+            except Exception as e:
+                logger.error(f"Error recording background work: {str(e)}")
+
+
+def redact(value: Any) -> Any:
+    """
+    Redact a decoded JSON payload, keeping its shape.
+
+    Args:
+        value: Decoded JSON value
+
+    Returns:
+        Copy with identifiers hashed and free text masked
+    """
+    if isinstance(value, dict):
+        return {key: _redact_field(key, item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+def redact_query(query: str) -> str:
+    """Redact the parameters of a query string."""
+    params = parse_qsl(query, keep_blank_values=True)
+    return urlencode([(key, _redact_field(key, value)) for key, value in params])
+
+
+def _redact_field(key: str, value: Any) -> Any:
+    """Redact one named field."""
+    if isinstance(value, str):
+        if key in HASHED_FIELDS:
+            return hashlib.sha256(value.encode()).hexdigest()[:16]
+        if key in MASKED_FIELDS:
+            return "x" * len(value)
+    return redact(value)
+
+
+class TrafficRecorder:
+    """Appends request records to a JSON-lines file."""
+
+    def __init__(self, path: str, redact_payloads: bool = True, sample_rate: float = 1.0):
+        """
+        Open the log for appending.
+
+        Each record is written with a single append, so several workers can
+        share one file.
+
+        Args:
+            path: Log file path
+            redact_payloads: Hash identifiers and mask free text
+            sample_rate: Fraction of requests recorded
+        """
+        self.path = path
+        self.redact_payloads = redact_payloads
+        self.sample_rate = sample_rate
+        self._fd: Optional[int] = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self._lock = threading.Lock()
+        logger.info(f"Recording traffic to {path}")
+
+    def sampled(self) -> bool:
+        """Decide whether to record the next request."""
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        Append a record.
+
+        Args:
+            record: Request or background record
+        """
+        if self.redact_payloads and not record.get("bg"):
+            record["query"] = redact_query(record["query"])
+            record["body"] = redact(record["body"])
+        line = orjson.dumps(record) + b"\n"
+        with self._lock:
+            if self._fd is not None:
+                os.write(self._fd, line)
+
+    def close(self) -> None:
+        """Close the log."""
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+class RecorderMiddleware:
+    """ASGI middleware recording requests, their payloads and upstream timings."""
+
+    def __init__(self, app: ASGIApp, recorder: TrafficRecorder):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            recorder: Destination of the records
+        """
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in SKIPPED_PATHS or not self.recorder.sampled():
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        capture_body = "json" in content_type.lower()
+        body = bytearray()
+        size = 0
+        status = 0
+        response_size = 0
+
+        async def receive_wrapper() -> Message:
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if capture_body and len(body) + len(chunk) <= MAX_RECORDED_BODY_BYTES:
+                    body.extend(chunk)
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, response_size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        calls: List[Dict[str, Any]] = []
+        token = _upstream_calls.set(calls)
+        recorder_token = _recorder.set(self.recorder)
+        wall = time.time()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            _upstream_calls.reset(token)
+            _recorder.reset(recorder_token)
+            payload = None
+            if capture_body and body and len(body) == size:
+                try:
+                    payload = orjson.loads(bytes(body))
+                except orjson.JSONDecodeError:
+                    payload = None
+            try:
+                self.recorder.write({
+                    "ts": round(wall, 3),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "ctype": content_type,
+                    "size": size,
+                    "body": payload,
+                    "status": status or 500,
+                    "ms": round((time.perf_counter() - start) * 1000, 1),
+                    "resp": response_size,
+                    "up": calls,
+                })
+            except Exception as e:
+                logger.error(f"Error recording request: {str(e)}")
+
+
+class ReplayMiddleware:
+    """ASGI middleware exposing a replayed request's recorded upstream calls.
+
+    Only installed in upstream stub mode; the stub client reproduces the calls
+    listed in the replay header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped ASGI application
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        raw = dict(scope["headers"]).get(REPLAY_HEADER.encode())
+        plan: List[Dict[str, Any]] = []
+        if raw:
+            try:
+                plan = list(orjson.loads(raw))
+            except orjson.JSONDecodeError:
+                logger.warning("Ignoring malformed replay header")
+        token = _replay_plan.set(plan)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _replay_plan.reset(token)
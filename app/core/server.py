@@ -0,0 +1,56 @@
+"""Server Integration - Drain requests before the server stops"""
+import asyncio
+from types import FrameType
+from typing import Optional
+import uvicorn
+from app.core.lifecycle import drain_running
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class GracefulServer(uvicorn.Server):
+    """Uvicorn server that drains the application before shutting down.
+
+    Plain uvicorn stops accepting connections as soon as it is signalled, so
+    readiness never gets a chance to fail first. Here the first exit signal
+    starts draining while the server keeps running; the server is stopped once
+    the drain finishes. A second signal stops it right away.
+    """
+
+    def __init__(self, config: uvicorn.Config):
+        """
+        Initialize the server.
+
+        Args:
+            config: Uvicorn configuration
+        """
+        super().__init__(config)
+        self._drain_task: Optional[asyncio.Task] = None
+
+    def handle_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        if self._drain_task is not None or not self.started:
+            super().handle_exit(sig, frame)
+            return
+        logger.info("Exit requested, draining before shutdown")
+        self._drain_task = asyncio.get_event_loop().create_task(self._drain_and_exit(sig, frame))
+
+    async def _drain_and_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        """Drain the running applications, then stop the server."""
+        try:
+            await drain_running()
+        finally:
+            super().handle_exit(sig, frame)
+
+
+def run(app: str, host: str = "0.0.0.0", port: int = 8000, **kwargs) -> None:
+    """
+    Serve an application with graceful draining.
+
+    Args:
+        app: Application import string, e.g. ``app.main:app``
+        host: Bind address
+        port: Bind port
+        **kwargs: Additional uvicorn configuration
+    """
+    GracefulServer(uvicorn.Config(app, host=host, port=port, **kwargs)).run()
@@ -1,21 +1,71 @@
-"""Application Startup and Shutdown Events"""
+"""Application Startup and Shutdown"""
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 from fastapi import FastAPI
+from app.core.lifecycle import InFlightMiddleware, Lifecycle
 from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.services.quota_service import get_quota_service
 
 logger = get_logger(__name__)
 
 
 def init_app(app: FastAPI) -> None:
-    """Initialize application events."""
-    
-    @app.on_event("startup")
-    async def startup_event():
-        """Execute on application startup."""
-        logger.info("Application startup")
-        # Initialize database, services, etc.
-    
-    @app.on_event("shutdown")
-    async def shutdown_event():
-        """Execute on application shutdown."""
-        logger.info("Application shutdown")
-        # Cleanup resources, connections, etc.
+    """Attach the lifecycle manager and its request tracking."""
+    app.state.lifecycle = Lifecycle()
+    app.add_middleware(InFlightMiddleware, lifecycle=app.state.lifecycle)
+    app.state.lifecycle.on_shutdown("memory", finish_compactions)
+    app.state.lifecycle.on_shutdown("quotas", flush_quotas)
+    app.state.lifecycle.on_shutdown("metrics", log_metrics)
+
+
+async def finish_compactions() -> None:
+    """Let running conversation compactions store their summaries."""
+    from app.api.deps import finish_background_work
+
+    await finish_background_work()
+
+
+async def flush_quotas() -> None:
+    """Persist usage counters recorded since the last periodic flush."""
+    await get_quota_service().flush()
+
+
+async def log_metrics() -> None:
+    """Report the final counters of this process."""
+    logger.info(f"Final metrics: {metrics.snapshot()}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start background work on startup; drain and flush on shutdown."""
+    lifecycle: Lifecycle = app.state.lifecycle
+
+    async def warm_up() -> None:
+        """Build services, then report ready."""
+        from app.api.deps import warm_up as warm_up_services
+
+        start = time.perf_counter()
+        try:
+            await warm_up_services()
+        except Exception as e:
+            # Services are still built lazily on first use; stay not-ready
+            logger.error(f"Service warm-up failed: {str(e)}")
+            return
+        if not lifecycle.draining:
+            lifecycle.ready = True
+        logger.info(f"Services ready in {time.perf_counter() - start:.2f}s")
+
+    logger.info("Application startup")
+    lifecycle.started()
+    # Warm up in the background so liveness checks are answered at once;
+    # /ready reports when services are built
+    lifecycle.spawn(warm_up(), "warm-up")
+    # Persist usage counters periodically
+    lifecycle.spawn(get_quota_service().run_flush_loop(), "quota-flush")
+
+    yield
+
+    logger.info("Application shutdown")
+    await lifecycle.shutdown()
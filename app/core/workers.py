@@ -0,0 +1,21 @@
+"""Gunicorn Workers - Uvicorn worker with graceful draining"""
+import sys
+from gunicorn.arbiter import Arbiter
+from uvicorn.workers import UvicornWorker
+from app.core.server import GracefulServer
+
+
+class GriotWorker(UvicornWorker):
+    """Uvicorn worker whose server drains requests before stopping.
+
+    Gunicorn sends workers SIGTERM on graceful shutdown and kills them after
+    ``graceful_timeout``, which must therefore exceed the drain deadline.
+    """
+
+    async def _serve(self) -> None:
+        self.config.app = self.wsgi
+        server = GracefulServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
@@ -1,8 +1,10 @@
 """Memory Repository - Database Access for Memory Storage"""
 from typing import List, Optional
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.core.logging import get_logger
+from app.db.models import ConversationSummary
 
 logger = get_logger(__name__)
 
@@ -58,3 +60,74 @@ class MemoryRepository:
         # TODO: Implement database delete
         logger.info(f"Deleting memory {memory_id}")
         return True
+    
+    def get_summary(self, conversation_id: str, user_id: str) -> Optional[dict]:
+        """
+        Retrieve the rolling summary of a user's conversation.
+        
+        Args:
+            conversation_id: Conversation identifier
+            user_id: Owner of the conversation
+            
+        Returns:
+            Dict with summary and summarized_upto, or None if not summarized yet
+        """
+        row = (
+            self.db.query(ConversationSummary)
+            .filter(
+                ConversationSummary.user_id == user_id,
+                ConversationSummary.conversation_id == conversation_id,
+            )
+            .one_or_none()
+        )
+        if row is None:
+            return None
+        return {"summary": row.summary, "summarized_upto": row.summarized_upto}
+    
+    def save_summary(
+        self,
+        conversation_id: str,
+        user_id: str,
+        summary: str,
+        summarized_upto: int,
+        expected_upto: int,
+    ) -> bool:
+        """
+        Store a new rolling summary if nobody else has extended it meanwhile.
+        
+        Args:
+            conversation_id: Conversation identifier
+            user_id: Owner of the conversation
+            summary: New summary text
+            summarized_upto: Last turn sequence number covered by the summary
+            expected_upto: Coverage of the summary this one was built from
+                (0 when there was none)
+            
+        Returns:
+            True if saved, False if the stored summary changed concurrently
+        """
+        values = {
+            "summary": summary,
+            "summarized_upto": summarized_upto,
+            "updated_at": datetime.utcnow(),
+        }
+        if expected_upto:
+            updated = (
+                self.db.query(ConversationSummary)
+                .filter(
+                    ConversationSummary.user_id == user_id,
+                    ConversationSummary.conversation_id == conversation_id,
+                    ConversationSummary.summarized_upto == expected_upto,
+                )
+                .update(values)
+            )
+            self.db.commit()
+            return updated == 1
+        
+        self.db.add(ConversationSummary(conversation_id=conversation_id, user_id=user_id, **values))
+        try:
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            return False
+        return True
@@ -0,0 +1,31 @@
+"""Database Models"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class QuotaBucket(Base):
+    """Usage counted for one user, metric and time bucket."""
+
+    __tablename__ = "quota_buckets"
+
+    user_id = Column(String(128), primary_key=True)
+    metric = Column(String(32), primary_key=True)
+    bucket = Column(Integer, primary_key=True, index=True)
+    amount = Column(Integer, nullable=False, default=0)
+
+
+class ConversationSummary(Base):
+    """Rolling summary of the older turns of a conversation."""
+
+    __tablename__ = "conversation_summaries"
+
+    # Conversation IDs are chosen by clients, so they are only unique per user
+    user_id = Column(String(128), primary_key=True)
+    conversation_id = Column(String(128), primary_key=True)
+    summary = Column(Text, nullable=False)
+    # Sequence number of the last turn folded into the summary
+    summarized_upto = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,67 @@
+"""Quota Repository - Database Access for Usage Counters"""
+from typing import Iterable, List, Tuple
+from sqlalchemy.orm import Session
+from app.core.logging import get_logger
+from app.db.models import QuotaBucket
+
+logger = get_logger(__name__)
+
+# (user_id, metric, bucket, amount)
+BucketRow = Tuple[str, str, int, int]
+
+
+class QuotaRepository:
+    """Repository for persisted quota counters."""
+    
+    def __init__(self, db: Session):
+        """
+        Initialize quota repository.
+        
+        Args:
+            db: Database session
+        """
+        self.db = db
+    
+    def save_buckets(self, rows: Iterable[BucketRow]) -> int:
+        """
+        Insert or update bucket totals.
+        
+        Args:
+            rows: Bucket totals to store
+            
+        Returns:
+            Number of rows written
+        """
+        count = 0
+        for user_id, metric, bucket, amount in rows:
+            self.db.merge(QuotaBucket(user_id=user_id, metric=metric, bucket=bucket, amount=amount))
+            count += 1
+        self.db.commit()
+        return count
+    
+    def load_buckets(self, since_bucket: int) -> List[BucketRow]:
+        """
+        Load bucket totals from a bucket index onwards.
+        
+        Args:
+            since_bucket: Oldest bucket index to load
+            
+        Returns:
+            Bucket totals
+        """
+        rows = self.db.query(QuotaBucket).filter(QuotaBucket.bucket >= since_bucket).all()
+        return [(row.user_id, row.metric, row.bucket, row.amount) for row in rows]
+    
+    def delete_before(self, bucket: int) -> int:
+        """
+        Delete buckets older than a bucket index.
+        
+        Args:
+            bucket: Buckets before this index are deleted
+            
+        Returns:
+            Number of rows deleted
+        """
+        deleted = self.db.query(QuotaBucket).filter(QuotaBucket.bucket < bucket).delete()
+        self.db.commit()
+        return deleted
@@ -1,26 +1,57 @@
 """Database Session Configuration"""
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from functools import lru_cache
+from typing import TYPE_CHECKING
 from app.core.config import settings
 
-# Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.orm import Session, sessionmaker
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+@lru_cache(maxsize=1)
+def get_engine() -> "Engine":
+    """
+    Get the database engine, creating it on first use.
+
+    Returns:
+        SQLAlchemy engine
+    """
+    from sqlalchemy import create_engine
+
+    return create_engine(
+        settings.DATABASE_URL,
+        connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    )
 
-def get_db() -> Session:
+
+@lru_cache(maxsize=1)
+def get_session_factory() -> "sessionmaker":
+    """
+    Get the session factory, creating it on first use.
+
+    Returns:
+        SQLAlchemy session factory bound to the engine
+    """
+    from sqlalchemy.orm import sessionmaker
+
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+def init_db() -> None:
+    """Create database tables that do not exist yet."""
+    from app.db.models import Base
+
+    Base.metadata.create_all(bind=get_engine())
+
+
+def get_db() -> "Session":
     """
     Get a database session.
-    
+
     Yields:
         Database session
     """
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
@@ -0,0 +1,482 @@
+"""Shared State Store - Cross-process caches, memory and counters
+
+The StateStore interface mirrors a small subset of Redis commands (GET, SET
+with expiry, SET NX, DEL, INCRBY, EXPIRE, RPUSH/LTRIM, LRANGE) so that a Redis-backed
+implementation can replace the local backends without touching callers. It is
+asynchronous: backends that block (SQLite waits on other workers' write locks)
+run off the event loop instead of stalling every request of the worker.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class StateStore(ABC):
+    """Key-value store shared by all workers of the service."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Get a value.
+
+        Args:
+            key: Key to look up
+
+        Returns:
+            Stored value, or None if missing or expired
+        """
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """
+        Get several values at once.
+
+        Args:
+            keys: Keys to look up
+
+        Returns:
+            Values in the same order as ``keys`` (None where missing)
+        """
+        return [await self.get(key) for key in keys]
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """
+        Set a value.
+
+        Args:
+            key: Key to set
+            value: Value to store
+            ttl: Expiry in seconds (None for no expiry)
+        """
+
+    @abstractmethod
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """
+        Set a value only if the key does not already exist.
+
+        Args:
+            key: Key to set
+            value: Value to store
+            ttl: Expiry in seconds (None for no expiry)
+
+        Returns:
+            True if the value was stored, False if the key already existed
+        """
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """
+        Delete a key (value or list).
+
+        Args:
+            key: Key to delete
+        """
+
+    @abstractmethod
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """
+        Atomically increment an integer counter.
+
+        Args:
+            key: Counter key
+            amount: Amount to add
+            ttl: Expiry in seconds, applied when the counter is created
+
+        Returns:
+            The counter value after incrementing
+        """
+
+    @abstractmethod
+    async def expire(self, key: str, ttl: float) -> bool:
+        """
+        Reset the expiry of an existing value.
+
+        Args:
+            key: Key of the value
+            ttl: New expiry in seconds from now
+
+        Returns:
+            True if the value exists and was updated
+        """
+
+    @abstractmethod
+    async def list_push(self, key: str, value: bytes, max_len: Optional[int] = None,
+                        ttl: Optional[float] = None) -> None:
+        """
+        Append to a list, keeping only the most recent ``max_len`` items.
+
+        Args:
+            key: List key
+            value: Item to append
+            max_len: Maximum list length (None for unbounded)
+            ttl: Expiry of the whole list in seconds, refreshed on every push
+        """
+
+    @abstractmethod
+    async def list_range(self, key: str) -> List[bytes]:
+        """
+        Get all items of a list, oldest first.
+
+        Args:
+            key: List key
+
+        Returns:
+            List items
+        """
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+
+
+class InMemoryStateStore(StateStore):
+    """Process-local store, suitable for a single worker and for tests."""
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self._values: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lists: Dict[str, Tuple[List[bytes], Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._get(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._values[key] = (value, _expires_at(ttl))
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._get(key) is not None:
+                return False
+            self._values[key] = (value, _expires_at(ttl))
+            return True
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._values.pop(key, None)
+            self._lists.pop(key, None)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            current = self._get(key)
+            if current is None:
+                value, expires_at = amount, _expires_at(ttl)
+            else:
+                value, expires_at = int(current) + amount, self._values[key][1]
+            self._values[key] = (str(value).encode(), expires_at)
+            return value
+
+    async def expire(self, key: str, ttl: float) -> bool:
+        with self._lock:
+            value = self._get(key)
+            if value is None:
+                return False
+            self._values[key] = (value, _expires_at(ttl))
+            return True
+
+    async def list_push(self, key: str, value: bytes, max_len: Optional[int] = None,
+                        ttl: Optional[float] = None) -> None:
+        with self._lock:
+            items = self._list(key)
+            items.append(value)
+            if max_len is not None and len(items) > max_len:
+                del items[:len(items) - max_len]
+            self._lists[key] = (items, _expires_at(ttl))
+
+    async def list_range(self, key: str) -> List[bytes]:
+        with self._lock:
+            return list(self._list(key))
+
+    def _get(self, key: str) -> Optional[bytes]:
+        """Get a live value; the caller must hold the lock."""
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._values[key]
+            return None
+        return value
+
+    def _list(self, key: str) -> List[bytes]:
+        """Get a live list; the caller must hold the lock."""
+        entry = self._lists.get(key)
+        if entry is None:
+            return []
+        items, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._lists[key]
+            return []
+        return items
+
+
+class SQLiteStateStore(StateStore):
+    """Store backed by a SQLite database in WAL mode, shared by all local workers.
+
+    Each call runs in a worker thread with its own connection, so waiting on
+    another process's write lock never blocks the event loop.
+    """
+
+    # Purge expired rows after this many writes
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str):
+        """
+        Initialize the store, creating the database if needed.
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._writes = 0
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS list_items ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, "
+                "value BLOB NOT NULL, expires_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS list_items_key ON list_items (key, id)")
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        return await asyncio.to_thread(self._get_many, keys)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        return await asyncio.to_thread(self._add, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        return await asyncio.to_thread(self._incr, key, amount, ttl)
+
+    async def expire(self, key: str, ttl: float) -> bool:
+        return await asyncio.to_thread(self._expire, key, ttl)
+
+    async def list_push(self, key: str, value: bytes, max_len: Optional[int] = None,
+                        ttl: Optional[float] = None) -> None:
+        await asyncio.to_thread(self._list_push, key, value, max_len, ttl)
+
+    async def list_range(self, key: str) -> List[bytes]:
+        return await asyncio.to_thread(self._list_range, key)
+
+    def close(self) -> None:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def _get(self, key: str) -> Optional[bytes]:
+        """Blocking implementation of get()."""
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Blocking implementation of get_many()."""
+        placeholders = ",".join("?" for _ in keys)
+        rows = self._conn().execute(
+            f"SELECT key, value FROM kv WHERE key IN ({placeholders}) "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (*keys, time.time()),
+        ).fetchall()
+        found = dict(rows)
+        return [found.get(key) for key in keys]
+
+    def _set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Blocking implementation of set()."""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, _expires_at(ttl)),
+            )
+
+    def _add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Blocking implementation of add()."""
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM kv WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (key, time.time()),
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, _expires_at(ttl)),
+            )
+            return cursor.rowcount == 1
+
+    def _delete(self, key: str) -> None:
+        """Blocking implementation of delete()."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            conn.execute("DELETE FROM list_items WHERE key = ?", (key,))
+
+    def _incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Blocking implementation of incr()."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM kv WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                value, expires_at = amount, _expires_at(ttl)
+            else:
+                value, expires_at = int(row[0]) + amount, row[1]
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, str(value).encode(), expires_at),
+            )
+            return value
+
+    def _expire(self, key: str, ttl: float) -> bool:
+        """Blocking implementation of expire()."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE kv SET expires_at = ?"
+                " WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (_expires_at(ttl), key, time.time()),
+            )
+            return cursor.rowcount == 1
+
+    def _list_push(self, key: str, value: bytes, max_len: Optional[int],
+                   ttl: Optional[float]) -> None:
+        """Blocking implementation of list_push()."""
+        expires_at = _expires_at(ttl)
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM list_items"
+                " WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (key, time.time()),
+            )
+            conn.execute(
+                "INSERT INTO list_items (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            conn.execute("UPDATE list_items SET expires_at = ? WHERE key = ?", (expires_at, key))
+            if max_len is not None:
+                conn.execute(
+                    "DELETE FROM list_items WHERE key = ? AND id NOT IN ("
+                    "SELECT id FROM list_items WHERE key = ? ORDER BY id DESC LIMIT ?)",
+                    (key, key, max_len),
+                )
+
+    def _list_range(self, key: str) -> List[bytes]:
+        """Blocking implementation of list_range()."""
+        rows = self._conn().execute(
+            "SELECT value FROM list_items WHERE key = ? "
+            "AND (expires_at IS NULL OR expires_at > ?) ORDER BY id",
+            (key, time.time()),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _conn(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Only used by this thread, but closed by whichever thread calls close()
+            conn = sqlite3.connect(
+                self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _transaction(self) -> "_Transaction":
+        """Open a write transaction that takes the database lock up front."""
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self._purge_expired()
+        return _Transaction(self._conn())
+
+    def _purge_expired(self) -> None:
+        """Delete expired rows."""
+        now = time.time()
+        with _Transaction(self._conn()) as conn:
+            conn.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM list_items WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+            )
+
+
+class _Transaction:
+    """Context manager for an immediate SQLite transaction."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def _expires_at(ttl: Optional[float]) -> Optional[float]:
+    """Convert a TTL in seconds into an absolute expiry timestamp."""
+    return None if ttl is None else time.time() + ttl
+
+
+def create_state_store(backend: str, path: str) -> StateStore:
+    """
+    Create a state store.
+
+    Args:
+        backend: "memory" (per process) or "sqlite" (shared by local workers)
+        path: Database path for the sqlite backend
+
+    Returns:
+        StateStore instance
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend == "memory":
+        return InMemoryStateStore()
+    if backend == "sqlite":
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        return SQLiteStateStore(path)
+    raise ValueError(f"Unknown state backend: {backend}")
+
+
+@lru_cache(maxsize=1)
+def get_state_store() -> StateStore:
+    """
+    Get the configured state store for this process.
+
+    Returns:
+        Process-wide StateStore instance
+    """
+    store = create_state_store(settings.STATE_BACKEND, settings.STATE_DB_PATH)
+    logger.info(f"Using {settings.STATE_BACKEND} state backend")
+    return store
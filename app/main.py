@@ -1,8 +1,11 @@
 """Griot Backend Application Entry Point"""
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app.core.config import settings
-from app.core.logging import setup_logging
-from app.core.startup import init_app
+from app.core.limits import BodySizeLimitMiddleware
+from app.core.logging import get_logger, setup_logging
+from app.core.recorder import RecorderMiddleware, ReplayMiddleware, TrafficRecorder
+from app.core.startup import init_app, lifespan
 from app.api.router import api_router
 
 
@@ -11,12 +14,35 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title=settings.APP_NAME,
         version=settings.APP_VERSION,
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
+    )
+    
+    # Reject oversized payloads before they are parsed
+    app.add_middleware(
+        BodySizeLimitMiddleware,
+        max_json_bytes=settings.MAX_JSON_BODY_BYTES,
+        max_upload_bytes=settings.MAX_UPLOAD_BYTES,
     )
     
     # Setup logging
     setup_logging()
     
-    # Initialize app
+    # Record traffic for offline replay
+    if settings.RECORDER_PATH:
+        recorder = TrafficRecorder(
+            settings.RECORDER_PATH,
+            redact_payloads=settings.RECORDER_REDACT,
+            sample_rate=settings.RECORDER_SAMPLE_RATE,
+        )
+        app.add_middleware(RecorderMiddleware, recorder=recorder)
+    
+    # Reproduce recorded upstream latencies when replaying against the stub
+    if settings.UPSTREAM_STUB:
+        get_logger(__name__).warning("Upstream stub mode: OpenAI will not be called")
+        app.add_middleware(ReplayMiddleware)
+    
+    # Track in-flight requests for graceful shutdown
     init_app(app)
     
     # Include API routes
@@ -29,5 +55,5 @@ app = create_app()
 
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from app.core.server import run
+    run("app.main:app", host="0.0.0.0", port=8000)
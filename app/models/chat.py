@@ -1,19 +1,48 @@
 """Chat Request and Response Models"""
-from typing import Optional, Dict
+from typing import Any, Dict, Literal, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from app.core.config import settings
+
+
+class ChatContext(BaseModel):
+    """Typed, bounded context hints for a chat request."""
+
+    persona: Optional[str] = Field(default=None, max_length=32, description="Persona prompt to use")
+    mood: Optional[str] = Field(
+        default=None, max_length=64, description="Desired tone, e.g. educational"
+    )
+    audience: Optional[str] = Field(default=None, max_length=64, description="Who the story is for")
+    language: Optional[str] = Field(default=None, max_length=32, description="Preferred language")
+    intent: Optional[Literal["story", "question"]] = Field(
+        default=None, description="Kind of request"
+    )
+    model_tier: Optional[Literal["fast", "quality"]] = Field(
+        default=None, description="Force a model tier"
+    )
+
+    model_config = ConfigDict(extra="forbid", protected_namespaces=())
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Get the context hints that were set."""
+        return self.model_dump(exclude_none=True)
 
 
 class ChatRequest(BaseModel):
     """Chat request schema."""
-    
-    user_id: str = Field(..., description="Unique user identifier")
-    message: str = Field(..., description="User's message")
-    context: Optional[Dict] = Field(default=None, description="Optional context data")
-    conversation_id: Optional[str] = Field(default=None, description="Optional conversation ID")
-    
-    class Config:
-        json_schema_extra = {
+
+    user_id: str = Field(..., min_length=1, max_length=128, description="Unique user identifier")
+    message: str = Field(
+        ..., min_length=1, max_length=settings.CHAT_MAX_MESSAGE_CHARS, description="User's message"
+    )
+    context: Optional[ChatContext] = Field(default=None, description="Optional context hints")
+    conversation_id: Optional[str] = Field(
+        default=None, max_length=128, description="Optional conversation ID"
+    )
+
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra={
             "example": {
                 "user_id": "user123",
                 "message": "Tell me a story about ancient civilizations",
@@ -21,18 +50,23 @@ class ChatRequest(BaseModel):
                 "conversation_id": "conv456"
             }
         }
+    )
+
+    def context_dict(self) -> Optional[Dict[str, Any]]:
+        """Get the context hints as a plain dict (None when not provided)."""
+        return self.context.as_dict() if self.context else None
 
 
 class ChatResponse(BaseModel):
     """Chat response schema."""
-    
+
     user_id: str = Field(..., description="User identifier")
     message: str = Field(..., description="AI response message")
     model: str = Field(..., description="Model used for generation")
     timestamp: datetime = Field(default_factory=datetime.utcnow)
-    
-    class Config:
-        json_schema_extra = {
+
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "user_id": "user123",
                 "message": "Once upon a time in Mali...",
@@ -40,3 +74,4 @@ class ChatResponse(BaseModel):
                 "timestamp": "2024-01-17T10:30:00"
             }
         }
+    )
@@ -19,3 +19,41 @@ Communication style:
 
 Remember: Stories are not just entertainment - they are vessels of knowledge, 
 culture, and human connection."""
+
+
+# Persona variants. Each persona is a complete, fixed system prompt so that the
+# prefix sent to the provider stays byte-identical for every request using it.
+GRIOT_PERSONAS = {
+    "griot": GRIOT_SYSTEM_PROMPT,
+    "teacher": GRIOT_SYSTEM_PROMPT + """
+
+Persona: You are speaking as a patient teacher. Favor clear structure, explain
+unfamiliar names and dates, and close with a short recap of the key lessons.""",
+    "elder": GRIOT_SYSTEM_PROMPT + """
+
+Persona: You are speaking as a village elder by the evening fire. Favor proverbs,
+call-and-response phrasing, and an unhurried, reflective rhythm.""",
+    "children": GRIOT_SYSTEM_PROMPT + """
+
+Persona: You are speaking to young children. Use simple words, short sentences,
+gentle humor, and avoid frightening or graphic details.""",
+}
+
+DEFAULT_PERSONA = "griot"
+
+# Rendered into the user turn ahead of the message; request context is
+# client-supplied and never sent with system authority.
+GRIOT_CONTEXT_TEMPLATE = """Context for this conversation:
+${details}
+Adapt your tone and content to this context without mentioning it explicitly."""
+
+# Used to fold older conversation turns into a rolling summary.
+GRIOT_SUMMARY_PROMPT = """You maintain the memory of a storytelling conversation between a user
+and Griot. Update the existing summary with the new turns below. Keep the
+names, places, story threads, facts the user shared, and open questions needed
+to continue the conversation naturally. Write plain prose, no more than
+300 words. Do not add anything that did not happen."""
+
+# Introduces the rolling summary ahead of the recent turns.
+GRIOT_SUMMARY_CONTEXT_TEMPLATE = """Summary of the earlier conversation:
+${summary}"""
@@ -0,0 +1,212 @@
+"""Prompt Templates - Precompiled persona prefixes and context rendering"""
+from functools import lru_cache
+from string import Template
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.logging import get_logger
+from app.prompts.griot import (
+    GRIOT_PERSONAS,
+    DEFAULT_PERSONA,
+    GRIOT_CONTEXT_TEMPLATE,
+    GRIOT_SUMMARY_PROMPT,
+    GRIOT_SUMMARY_CONTEXT_TEMPLATE,
+)
+
+logger = get_logger(__name__)
+
+# Context keys that select a template or a model rather than being rendered.
+RESERVED_CONTEXT_KEYS = {"persona", "model_tier"}
+
+
+class PromptTemplate:
+    """A prompt template compiled once and rendered many times."""
+
+    def __init__(self, name: str, source: str):
+        """
+        Compile a prompt template.
+
+        Args:
+            name: Template name
+            source: Template text using ``$placeholder`` syntax
+
+        Raises:
+            ValueError: If the template source is malformed
+        """
+        self.name = name
+        self.template = Template(source)
+        if not self.template.is_valid():
+            raise ValueError(f"Invalid prompt template: {name}")
+        self.placeholders = frozenset(self.template.get_identifiers())
+
+    def render(self, **values: str) -> str:
+        """
+        Render the template.
+
+        Args:
+            **values: Placeholder values
+
+        Returns:
+            Rendered prompt text
+
+        Raises:
+            KeyError: If a placeholder value is missing
+        """
+        return self.template.substitute(values)
+
+
+class PromptRegistry:
+    """Registry of compiled persona prefixes and context templates."""
+
+    def __init__(
+        self,
+        personas: Optional[Dict[str, str]] = None,
+        context_template: str = GRIOT_CONTEXT_TEMPLATE,
+        default_persona: str = DEFAULT_PERSONA,
+        cache_size: int = 1024,
+    ):
+        """
+        Compile all templates.
+
+        Args:
+            personas: Mapping of persona name to system prompt
+            context_template: Template used to render request context
+            default_persona: Persona used when none (or an unknown one) is requested
+            cache_size: Maximum number of memoized context renderings
+        """
+        personas = personas if personas is not None else GRIOT_PERSONAS
+        if default_persona not in personas:
+            raise ValueError(f"Unknown default persona: {default_persona}")
+
+        self.default_persona = default_persona
+        # Prefix message dicts are built once and reused as-is so that the
+        # serialized prefix is byte-identical across requests.
+        self._prefixes: Dict[str, Dict[str, str]] = {
+            name: {"role": "system", "content": prompt}
+            for name, prompt in personas.items()
+        }
+        self.context_template = PromptTemplate("context", context_template)
+        self.summary_template = PromptTemplate("summary", GRIOT_SUMMARY_CONTEXT_TEMPLATE)
+        self._summary_prefix = {"role": "system", "content": GRIOT_SUMMARY_PROMPT}
+        self._render_cached = lru_cache(maxsize=cache_size)(self._render_context)
+        logger.info(f"Compiled {len(self._prefixes)} persona prompts")
+
+    @property
+    def personas(self) -> List[str]:
+        """Names of the available personas."""
+        return list(self._prefixes)
+
+    def prefix(self, persona: Optional[str] = None) -> Dict[str, str]:
+        """
+        Get the stable system message for a persona.
+
+        Args:
+            persona: Persona name (falls back to the default persona)
+
+        Returns:
+            System message dict shared across requests
+        """
+        return self._prefixes.get(persona or self.default_persona,
+                                  self._prefixes[self.default_persona])
+
+    def render_context(self, context: Optional[Dict[str, Any]]) -> Optional[str]:
+        """
+        Render request context into a prompt fragment (memoized).
+
+        Args:
+            context: Request context, e.g. ``{"mood": "educational"}``
+
+        Returns:
+            Rendered context text, or None if there is nothing to render
+        """
+        key = _context_key(context)
+        if not key:
+            return None
+        return self._render_cached(self.context_template.name, key)
+
+    def build_messages(
+        self,
+        message: str,
+        context: Optional[Dict[str, Any]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        summary: Optional[str] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Build the chat messages for a request.
+
+        The persona prefix always comes first; everything that varies per
+        request follows it. Request context is client-supplied, so it is
+        rendered into the user turn rather than given system authority.
+
+        Args:
+            message: User message
+            context: Optional request context
+            history: Optional recent conversation messages
+            summary: Optional rolling summary of older conversation turns
+
+        Returns:
+            List of chat messages
+        """
+        persona = (context or {}).get("persona")
+        messages = [self.prefix(persona)]
+        if summary:
+            rendered_summary = self.summary_template.render(summary=summary)
+            messages.append({"role": "system", "content": rendered_summary})
+        if history:
+            messages.extend(history)
+        rendered = self.render_context(context)
+        if rendered:
+            message = f"{rendered}\n\n{message}"
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    def build_summary_messages(
+        self,
+        turns: List[Dict[str, str]],
+        previous_summary: Optional[str] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Build the messages asking the model to extend a conversation summary.
+
+        Args:
+            turns: Conversation turns to fold into the summary
+            previous_summary: Existing summary, if any
+
+        Returns:
+            List of chat messages
+        """
+        transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+        parts = []
+        if previous_summary:
+            parts.append(f"Existing summary:\n{previous_summary}")
+        parts.append(f"New turns:\n{transcript}")
+        return [self._summary_prefix, {"role": "user", "content": "\n\n".join(parts)}]
+
+    def cache_info(self):
+        """Get memoization statistics for context rendering."""
+        return self._render_cached.cache_info()
+
+    def _render_context(self, template_name: str, key: Tuple[Tuple[str, str], ...]) -> str:
+        """Render the context template for a normalized context key."""
+        details = "\n".join(f"- {name}: {value}" for name, value in key)
+        return self.context_template.render(details=details)
+
+
+def _context_key(context: Optional[Dict[str, Any]]) -> Tuple[Tuple[str, str], ...]:
+    """Normalize a context dict into a hashable, order-independent key."""
+    if not context:
+        return ()
+    return tuple(sorted(
+        (str(name), str(value))
+        for name, value in context.items()
+        if name not in RESERVED_CONTEXT_KEYS and value is not None
+    ))
+
+
+@lru_cache(maxsize=1)
+def get_prompt_registry() -> PromptRegistry:
+    """
+    Get the shared prompt registry, compiling it on first use.
+
+    Returns:
+        Process-wide PromptRegistry instance
+    """
+    return PromptRegistry()
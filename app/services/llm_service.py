@@ -1,58 +1,257 @@
 """LLM Service - OpenAI Interaction"""
-from typing import Optional
-from openai import AsyncOpenAI
+import time
+from typing import Any, Dict, List, Optional, Tuple
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.core.recorder import record_upstream, record_upstream_failure
 from app.models.chat import ChatRequest, ChatResponse
-from app.prompts.griot import GRIOT_SYSTEM_PROMPT
+from app.prompts.templates import get_prompt_registry
+from app.services.memory_service import MemoryService
+from app.services.model_router import ModelRouter, is_retryable
+from app.services.quota_service import TOKENS, QuotaService, get_quota_service
+from app.services.speculation_service import SpeculationService
 
 logger = get_logger(__name__)
 
+metrics.register_ratio("llm.prefix_cache_hit_rate", "llm.cached_prompt_tokens", "llm.prompt_tokens")
+
 
 class LLMService:
     """Service for interacting with OpenAI API."""
-    
-    def __init__(self):
-        """Initialize LLM service with API key."""
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+
+    def __init__(self, router: Optional[ModelRouter] = None,
+                 quotas: Optional[QuotaService] = None,
+                 memory: Optional[MemoryService] = None,
+                 speculation: Optional[SpeculationService] = None):
+        """
+        Initialize LLM service with API key.
+
+        Args:
+            router: Model router (a default router is created if omitted)
+            quotas: Quota service charged with each request's token usage
+            memory: Conversation memory (defaults to one compacted by this service)
+            speculation: Precomputed follow-up replies (disabled unless configured)
+        """
+        if settings.UPSTREAM_STUB:
+            from app.services.upstream_stub import StubOpenAI
+            self.client = StubOpenAI()
+        else:
+            # Deferred import: the OpenAI SDK is slow to import and only needed
+            # once a service is actually constructed
+            from openai import AsyncOpenAI
+            self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = settings.OPENAI_MODEL
-    
+        self.prompts = get_prompt_registry()
+        self.router = router or ModelRouter()
+        self.quotas = quotas or get_quota_service()
+        self.memory = memory or MemoryService(summarizer=self.summarize_conversation)
+        self.speculation = speculation or SpeculationService()
+
     async def generate_response(self, request: ChatRequest) -> ChatResponse:
         """
         Generate a response using OpenAI API.
-        
+
+        The model is chosen per request by the router; if the chosen model
+        times out, is rate limited or fails server-side, the remaining
+        candidates are tried in order; other errors are raised at once.
+        Requests with a conversation ID see the conversation's rolling summary
+        and recent turns, and follow-ups that were precomputed are answered
+        without a model call.
+
         Args:
             request: Chat request with user message and context
-            
+
         Returns:
             ChatResponse with generated message
         """
-        try:
-            messages = [
-                {
-                    "role": "system",
-                    "content": GRIOT_SYSTEM_PROMPT
-                },
-                {
-                    "role": "user",
-                    "content": request.message
-                }
-            ]
-            
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=2000
+        context = request.context_dict()
+        summary, history = None, None
+        if request.conversation_id:
+            speculated = await self.speculation.take(
+                request.conversation_id, request.user_id, request.message,
+                await self.memory.last_turn(request.conversation_id, request.user_id)
+            )
+            if speculated is not None:
+                # The user pays for a speculated reply only once it is served
+                await self.quotas.record(request.user_id, TOKENS, speculated.tokens)
+                await self._finish_exchange(request, speculated.message, context)
+                return ChatResponse(
+                    user_id=request.user_id,
+                    message=speculated.message,
+                    model=speculated.model
+                )
+            summary, history = await self.memory.get_conversation(
+                request.conversation_id, request.user_id
+            )
+        messages = self.prompts.build_messages(request.message, context, history, summary)
+        decision = self.router.route(request.message, context)
+        last_error: Optional[Exception] = None
+
+        for tier in decision.tiers:
+            start = time.perf_counter()
+            try:
+                response = await self._complete("chat", tier.model, messages, 0.7, tier.max_tokens)
+            except Exception as e:
+                if not is_retryable(e):
+                    # The request itself is at fault, not the model
+                    raise
+                self.router.record_failure(tier)
+                logger.warning(f"Model {tier.model} failed: {str(e)}")
+                last_error = e
+                continue
+
+            self.router.record_success(
+                decision, tier, (time.perf_counter() - start) * 1000,
+                getattr(response.usage, "completion_tokens", None)
             )
-            
+            self._record_usage(response.usage)
+            await self.quotas.record_tokens(request.user_id, response.usage)
             content = response.choices[0].message.content
-            
+            await self._finish_exchange(request, content, context)
+
             return ChatResponse(
                 user_id=request.user_id,
                 message=content,
-                model=self.model
+                model=tier.model
+            )
+
+        logger.error(f"Error generating response: {str(last_error)}")
+        raise last_error
+
+    async def _finish_exchange(self, request: ChatRequest, reply: str,
+                               context: Optional[Dict[str, Any]]) -> None:
+        """
+        Store an exchange of a conversation and speculate on its follow-ups.
+
+        Args:
+            request: Chat request that was answered
+            reply: Reply sent to the user
+            context: Request context
+        """
+        if not request.conversation_id:
+            return
+        await self.memory.record_exchange(
+            request.conversation_id, request.user_id, request.message, reply
+        )
+        await self.speculation.schedule(
+            request.conversation_id, request.user_id,
+            await self.memory.last_turn(request.conversation_id, request.user_id),
+            request.message, context, self._speculate
+        )
+
+    async def _speculate(self, conversation_id: str, user_id: str, message: str,
+                         context: Optional[Dict[str, Any]]) -> Tuple[str, str, int]:
+        """
+        Generate the reply a follow-up message would get, without storing it.
+
+        Only the routed model is tried; a failed speculation is simply dropped.
+
+        Args:
+            conversation_id: Conversation identifier
+            user_id: Owner of the conversation
+            message: Predicted follow-up message
+            context: Context of the request being followed up
+
+        Returns:
+            Tuple of (reply, model, tokens used)
+        """
+        summary, history = await self.memory.get_conversation(conversation_id, user_id)
+        tier = self.router.route(message, context).primary
+        messages = self.prompts.build_messages(message, context, history, summary)
+        response = await self._complete("speculation", tier.model, messages, 0.7, tier.max_tokens)
+        self._record_usage(response.usage)
+        usage = response.usage
+        tokens = 0
+        if usage is not None:
+            tokens = (usage.prompt_tokens or 0) + (usage.completion_tokens or 0)
+        return response.choices[0].message.content, tier.model, tokens
+
+    async def summarize_conversation(self, previous_summary: Optional[str],
+                                     turns: List[Dict], user_id: str) -> str:
+        """
+        Fold conversation turns into a rolling summary.
+
+        Summaries always use the fast tier; the tokens are charged to the
+        conversation's owner.
+
+        Args:
+            previous_summary: Existing summary, if any
+            turns: Turns to fold into the summary
+            user_id: Owner of the conversation
+
+        Returns:
+            Updated summary text
+        """
+        tier = self.router.fast
+        messages = self.prompts.build_summary_messages(turns, previous_summary)
+        response = await self._complete("summary", tier.model, messages, 0.3, 500)
+        self._record_usage(response.usage)
+        await self.quotas.record_tokens(user_id, response.usage)
+        return response.choices[0].message.content
+
+    async def _complete(self, call: str, model: str, messages: List[Dict[str, str]],
+                        temperature: float, max_tokens: int) -> Any:
+        """
+        Request a completion and record it as an upstream call.
+
+        Args:
+            call: Upstream call name: ``chat`` for replies, or ``speculation``
+                and ``summary`` for background work
+            model: Model to use
+            messages: Prompt messages
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+
+        Returns:
+            The completion response
+        """
+        start = time.perf_counter()
+        try:
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
             )
         except Exception as e:
-            logger.error(f"Error generating response: {str(e)}")
+            record_upstream_failure(call, start, e, model=model)
             raise
+        usage = response.usage
+        record_upstream(
+            call, start, model=model,
+            pt=getattr(usage, "prompt_tokens", 0), ct=getattr(usage, "completion_tokens", 0)
+        )
+        return response
+
+    def _record_usage(self, usage: Any) -> None:
+        """
+        Record token usage, including provider-side prefix cache hits.
+
+        Args:
+            usage: Usage object from the completion response (may be None)
+        """
+        if usage is None:
+            return
+        metrics.incr("llm.requests")
+        metrics.incr("llm.prompt_tokens", usage.prompt_tokens or 0)
+        metrics.incr("llm.completion_tokens", usage.completion_tokens or 0)
+        metrics.incr("llm.cached_prompt_tokens", cached_prompt_tokens(usage))
+
+
+def cached_prompt_tokens(usage: Any) -> int:
+    """
+    Extract the number of prompt tokens served from the provider's prefix cache.
+
+    Args:
+        usage: Usage object from a completion response
+
+    Returns:
+        Cached prompt token count (0 when not reported)
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    if details is None:
+        return 0
+    if isinstance(details, dict):
+        return details.get("cached_tokens") or 0
+    return getattr(details, "cached_tokens", 0) or 0
@@ -1,56 +1,328 @@
 """Memory Service - Short and Long-term Memory Management"""
-from typing import List, Dict, Optional
+import asyncio
+import json
+from typing import Awaitable, Callable, List, Dict, Optional, Tuple
 from datetime import datetime
+from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.core.recorder import detached
+from app.db.state_store import StateStore, get_state_store
+from app.utils.ids import conversation_scope
 
 logger = get_logger(__name__)
 
+# Short-term memories expire after a day without activity
+SHORT_TERM_TTL_SECONDS = 24 * 60 * 60
+
+# Conversation turns expire after a week without activity
+CONVERSATION_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# A compaction holding its lock longer than this is assumed to have died
+COMPACTION_LOCK_SECONDS = 120
+
+# Rough characters-per-token ratio used to estimate prompt size
+CHARS_PER_TOKEN = 4
+
+# (previous summary, turns to fold in, user id) -> new summary
+Summarizer = Callable[[Optional[str], List[Dict], str], Awaitable[str]]
+
 
 class MemoryService:
     """Service for managing short-term and long-term memory."""
-    
-    def __init__(self):
-        """Initialize memory service."""
-        self.short_term_memory: List[Dict] = []
+
+    def __init__(
+        self,
+        store: Optional[StateStore] = None,
+        summarizer: Optional[Summarizer] = None,
+        trigger_tokens: int = settings.COMPACTION_TRIGGER_TOKENS,
+        keep_recent_turns: int = settings.COMPACTION_KEEP_RECENT_TURNS,
+        max_turns: int = settings.MAX_CONVERSATION_TURNS,
+    ):
+        """
+        Initialize memory service.
+
+        Args:
+            store: Shared state store (defaults to the configured store) so that
+                every worker sees the same short-term memory
+            summarizer: Coroutine folding turns into a summary (None disables compaction)
+            trigger_tokens: Estimated size of unsummarized turns that triggers compaction
+            keep_recent_turns: Number of latest turns always kept verbatim
+            max_turns: Maximum number of turns stored per conversation
+        """
+        self.store = store or get_state_store()
         self.max_short_term = 10
-    
-    def add_short_term_memory(self, user_id: str, content: str) -> None:
+        self.summarizer = summarizer
+        self.trigger_tokens = trigger_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.max_turns = max_turns
+        self._compactions: Dict[str, asyncio.Task] = {}
+
+    async def add_short_term_memory(self, user_id: str, content: str) -> None:
         """
         Add content to short-term memory.
-        
+
         Args:
             user_id: User identifier
             content: Memory content
         """
-        self.short_term_memory.append({
+        entry = {
             "user_id": user_id,
             "content": content,
-            "timestamp": datetime.utcnow()
-        })
-        
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
         # Keep only recent memories
-        if len(self.short_term_memory) > self.max_short_term:
-            self.short_term_memory.pop(0)
-    
-    def get_short_term_memory(self, user_id: str) -> List[Dict]:
+        await self.store.list_push(
+            self._short_term_key(user_id),
+            json.dumps(entry).encode(),
+            max_len=self.max_short_term,
+            ttl=SHORT_TERM_TTL_SECONDS
+        )
+
+    async def get_short_term_memory(self, user_id: str) -> List[Dict]:
         """
         Retrieve short-term memory for a user.
-        
+
         Args:
             user_id: User identifier
-            
+
         Returns:
             List of recent memories
         """
-        return [m for m in self.short_term_memory if m["user_id"] == user_id]
-    
+        memories = []
+        for raw in await self.store.list_range(self._short_term_key(user_id)):
+            entry = json.loads(raw)
+            entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+            memories.append(entry)
+        return memories
+
     async def save_long_term_memory(self, user_id: str, content: str) -> None:
         """
         Save content to long-term memory (database).
-        
+
         Args:
             user_id: User identifier
             content: Memory content
         """
         # TODO: Implement database persistence
         logger.info(f"Saving long-term memory for user {user_id}")
+
+    async def get_conversation(self, conversation_id: str,
+                               user_id: str) -> Tuple[Optional[str], List[Dict[str, str]]]:
+        """
+        Get the prompt history of a conversation.
+
+        Conversations are scoped by their owner: another user sending the same
+        conversation ID sees (and extends) a conversation of their own.
+
+        Args:
+            conversation_id: Conversation identifier
+            user_id: Owner of the conversation
+
+        Returns:
+            Tuple of (rolling summary or None, turns not covered by the summary)
+        """
+        summary = await asyncio.to_thread(self._load_summary, conversation_id, user_id)
+        summarized_upto = summary["summarized_upto"] if summary else 0
+        if summarized_upto > await self.last_turn(conversation_id, user_id):
+            # The turn counter restarted after the summary was written (see
+            # _add_turn), so every stored turn is newer than the summary
+            summarized_upto = 0
+        turns = [
+            {"role": turn["role"], "content": turn["content"]}
+            for turn in await self._turns(conversation_id, user_id)
+            if turn["seq"] > summarized_upto
+        ]
+        return (summary["summary"] if summary else None), turns
+
+    async def last_turn(self, conversation_id: str, user_id: str) -> int:
+        """
+        Get the sequence number of a conversation's latest turn.
+
+        Args:
+            conversation_id: Conversation identifier
+            user_id: Owner of the conversation
+
+        Returns:
+            Latest turn number (0 for a new conversation)
+        """
+        return int(await self.store.get(self._seq_key(conversation_id, user_id)) or 0)
+
+    async def record_exchange(self, conversation_id: str, user_id: str,
+                              message: str, reply: str) -> None:
+        """
+        Store a user message and Griot's reply, then compact in the background if needed.
+
+        Args:
+            conversation_id: Conversation identifier
+            user_id: Owner of the conversation
+            message: User message
+            reply: Griot's reply
+        """
+        await self._add_turn(conversation_id, user_id, "user", message)
+        await self._add_turn(conversation_id, user_id, "assistant", reply)
+        self.schedule_compaction(conversation_id, user_id)
+
+    def schedule_compaction(self, conversation_id: str, user_id: str) -> Optional[asyncio.Task]:
+        """
+        Start compacting a conversation off the request path.
+
+        At most one compaction per conversation runs in this process; the
+        compaction itself takes a lock shared with other workers.
+
+        Args:
+            conversation_id: Conversation identifier
+            user_id: Owner of the conversation
+
+        Returns:
+            The running compaction task, or None if compaction is disabled
+        """
+        if self.summarizer is None:
+            return None
+        scope = conversation_scope(user_id, conversation_id)
+        running = self._compactions.get(scope)
+        if running is not None and not running.done():
+            return running
+        task = asyncio.create_task(detached(self.compact(conversation_id, user_id)))
+        self._compactions[scope] = task
+        task.add_done_callback(lambda _: self._compactions.pop(scope, None))
+        return task
+
+    async def compact(self, conversation_id: str, user_id: str) -> bool:
+        """
+        Fold older turns into the conversation's rolling summary.
+
+        Compaction is incremental: only turns newer than the existing summary
+        are sent to the summarizer, together with that summary. It is safe to
+        run concurrently: a shared lock lets one worker proceed, and the summary
+        is only replaced if it has not changed since it was read.
+
+        Args:
+            conversation_id: Conversation identifier
+            user_id: Owner of the conversation
+
+        Returns:
+            True if a new summary was stored
+        """
+        lock_key = f"memory:conv:{conversation_scope(user_id, conversation_id)}:compacting"
+        if not await self.store.add(lock_key, b"1", ttl=COMPACTION_LOCK_SECONDS):
+            return False
+        try:
+            summary = await asyncio.to_thread(self._load_summary, conversation_id, user_id)
+            summarized_upto = summary["summarized_upto"] if summary else 0
+            turns = await self._turns(conversation_id, user_id)
+            pending = [turn for turn in turns if turn["seq"] > summarized_upto]
+            if estimate_tokens(pending) <= self.trigger_tokens:
+                return False
+
+            to_fold = pending[:len(pending) - self.keep_recent_turns]
+            if not to_fold:
+                return False
+
+            previous = summary["summary"] if summary else None
+            new_summary = await self.summarizer(previous, to_fold, user_id)
+            saved = await asyncio.to_thread(
+                self._save_summary, conversation_id, user_id, new_summary,
+                to_fold[-1]["seq"], summarized_upto
+            )
+            if saved:
+                metrics.incr("memory.compactions")
+                logger.info(f"Compacted {len(to_fold)} turns of conversation {conversation_id}")
+            else:
+                metrics.incr("memory.compaction_conflicts")
+            return saved
+        except Exception as e:
+            logger.error(f"Error compacting conversation {conversation_id}: {str(e)}")
+            return False
+        finally:
+            await self.store.delete(lock_key)
+
+    async def wait_for_compactions(self) -> None:
+        """Wait for the compactions running in this process to finish."""
+        tasks = [task for task in self._compactions.values() if not task.done()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _add_turn(self, conversation_id: str, user_id: str, role: str, content: str) -> None:
+        """
+        Append a numbered turn to a conversation.
+
+        The turn counter expires together with the turns, a week after the last
+        one. The summary is kept, so a restarted counter is moved past the turns
+        the summary covers; new turns are never mistaken for summarized ones.
+        """
+        seq_key = self._seq_key(conversation_id, user_id)
+        seq = await self.store.incr(seq_key, ttl=CONVERSATION_TTL_SECONDS)
+        if seq == 1:
+            summary = await asyncio.to_thread(self._load_summary, conversation_id, user_id)
+            if summary is not None and summary["summarized_upto"] >= seq:
+                seq = await self.store.incr(seq_key, summary["summarized_upto"])
+        else:
+            await self.store.expire(seq_key, CONVERSATION_TTL_SECONDS)
+        await self.store.list_push(
+            self._turns_key(conversation_id, user_id),
+            json.dumps({"seq": seq, "role": role, "content": content}).encode(),
+            max_len=self.max_turns,
+            ttl=CONVERSATION_TTL_SECONDS
+        )
+
+    async def _turns(self, conversation_id: str, user_id: str) -> List[Dict]:
+        """Get all stored turns of a conversation, oldest first."""
+        raw_turns = await self.store.list_range(self._turns_key(conversation_id, user_id))
+        return [json.loads(raw) for raw in raw_turns]
+
+    @staticmethod
+    def _load_summary(conversation_id: str, user_id: str) -> Optional[dict]:
+        """Read a conversation summary through the memory repository."""
+        from app.db.memory_repo import MemoryRepository
+        from app.db.session import get_session_factory
+
+        db = get_session_factory()()
+        try:
+            return MemoryRepository(db).get_summary(conversation_id, user_id)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _save_summary(conversation_id: str, user_id: str, summary: str,
+                      summarized_upto: int, expected_upto: int) -> bool:
+        """Write a conversation summary through the memory repository."""
+        from app.db.memory_repo import MemoryRepository
+        from app.db.session import get_session_factory
+
+        db = get_session_factory()()
+        try:
+            return MemoryRepository(db).save_summary(
+                conversation_id, user_id, summary, summarized_upto, expected_upto
+            )
+        finally:
+            db.close()
+
+    @staticmethod
+    def _short_term_key(user_id: str) -> str:
+        """Get the state store key for a user's short-term memory."""
+        return f"memory:short:{user_id}"
+
+    @staticmethod
+    def _seq_key(conversation_id: str, user_id: str) -> str:
+        """Get the state store key for a conversation's turn counter."""
+        return f"memory:conv:{conversation_scope(user_id, conversation_id)}:seq"
+
+    @staticmethod
+    def _turns_key(conversation_id: str, user_id: str) -> str:
+        """Get the state store key for a conversation's turns."""
+        return f"memory:conv:{conversation_scope(user_id, conversation_id)}:turns"
+
+
+def estimate_tokens(turns: List[Dict]) -> int:
+    """
+    Estimate the prompt tokens used by conversation turns.
+
+    Args:
+        turns: Turns with a ``content`` field
+
+    Returns:
+        Approximate token count
+    """
+    return sum(len(turn["content"]) for turn in turns) // CHARS_PER_TOKEN
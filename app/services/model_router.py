@@ -0,0 +1,292 @@
+"""Model Router - Per-request model selection and fallback"""
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+
+logger = get_logger(__name__)
+
+FAST_TIER = "fast"
+QUALITY_TIER = "quality"
+
+# Phrases that signal a request for long-form storytelling
+STORY_PATTERN = re.compile(
+    r"\b(story|stories|tale|tales|legend|legends|myth|myths|epic|fable|narrate|"
+    r"once upon|tell me (?:about|of|more)|what happened next|history of|saga)\b",
+    re.IGNORECASE,
+)
+
+# Smoothing factor for latency and error-rate moving averages
+EWMA_ALPHA = 0.2
+
+# Upstream statuses worth retrying on another model: timeout and rate limit
+RETRYABLE_STATUSES = {408, 429}
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Check whether a failed upstream call may succeed on another model.
+
+    Timeouts, connection errors, rate limits and server errors are retryable.
+    Other client errors (bad request, context length, content policy) would
+    fail the same way on any model.
+
+    Args:
+        error: Exception raised by the upstream call
+
+    Returns:
+        True if the call should fall back to the next model
+    """
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUSES or status >= 500
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    # Deferred import, as in LLMService: only needed once a call has failed
+    from openai import APIConnectionError
+    return isinstance(error, APIConnectionError)
+
+
+class ModelTier:
+    """A routable model with its generation limits."""
+
+    def __init__(self, name: str, model: str, max_tokens: int):
+        """
+        Initialize a model tier.
+
+        Args:
+            name: Tier name (fast or quality)
+            model: Upstream model identifier
+            max_tokens: Completion token limit for this tier
+        """
+        self.name = name
+        self.model = model
+        self.max_tokens = max_tokens
+
+
+class ModelStats:
+    """Moving averages of relative latency and error rate for one model."""
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.slowness: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.updated_at = 0.0
+
+    def record(self, slowness: Optional[float], ok: bool) -> None:
+        """
+        Record the outcome of an upstream call.
+
+        Args:
+            slowness: Call latency as a fraction of the latency allowed for its
+                completion length (None for failures)
+            ok: Whether the call succeeded
+        """
+        self.requests += 1
+        self.updated_at = time.monotonic()
+        self.error_rate += EWMA_ALPHA * ((0.0 if ok else 1.0) - self.error_rate)
+        if slowness is not None:
+            if self.slowness is None:
+                self.slowness = slowness
+            else:
+                self.slowness += EWMA_ALPHA * (slowness - self.slowness)
+
+
+class RoutingDecision:
+    """The outcome of routing one request."""
+
+    def __init__(self, tiers: List[ModelTier], reason: str):
+        """
+        Initialize a routing decision.
+
+        Args:
+            tiers: Candidate tiers in the order they should be tried
+            reason: Why the primary tier was chosen
+        """
+        self.tiers = tiers
+        self.reason = reason
+        self.timestamp = time.time()
+        self.served_by: Optional[str] = None
+
+    @property
+    def primary(self) -> ModelTier:
+        """The tier tried first."""
+        return self.tiers[0]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Get a serializable view of the decision."""
+        return {
+            "model": self.primary.model,
+            "tier": self.primary.name,
+            "reason": self.reason,
+            "candidates": [tier.model for tier in self.tiers],
+            "served_by": self.served_by,
+            "timestamp": self.timestamp,
+        }
+
+
+class ModelRouter:
+    """Chooses a model per request from length, intent, hints and model health."""
+
+    def __init__(
+        self,
+        fast: Optional[ModelTier] = None,
+        quality: Optional[ModelTier] = None,
+        enabled: bool = settings.ROUTER_ENABLED,
+        short_message_chars: int = settings.ROUTER_SHORT_MESSAGE_CHARS,
+        max_error_rate: float = settings.ROUTER_MAX_ERROR_RATE,
+        max_base_latency_ms: float = settings.ROUTER_MAX_BASE_LATENCY_MS,
+        max_ms_per_token: float = settings.ROUTER_MAX_MS_PER_TOKEN,
+        recovery_seconds: float = 30.0,
+        history_size: int = 100,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            fast: Tier for short, simple turns
+            quality: Tier for storytelling and long inputs
+            enabled: When False, always route to the quality tier
+            short_message_chars: Messages up to this length count as short
+            max_error_rate: Error rate above which a model is considered unhealthy
+            max_base_latency_ms: Latency allowed for a call before any completion tokens
+            max_ms_per_token: Latency allowed per completion token on top of the base;
+                a model averaging more than its allowance is considered unhealthy
+            recovery_seconds: Idle time after which an unhealthy model is retried
+            history_size: Number of recent routing decisions to keep
+        """
+        self.fast = fast or ModelTier(
+            FAST_TIER, settings.OPENAI_FAST_MODEL, settings.ROUTER_FAST_MAX_TOKENS
+        )
+        self.quality = quality or ModelTier(QUALITY_TIER, settings.OPENAI_MODEL, 2000)
+        self.enabled = enabled
+        self.short_message_chars = short_message_chars
+        self.max_error_rate = max_error_rate
+        self.max_base_latency_ms = max_base_latency_ms
+        self.max_ms_per_token = max_ms_per_token
+        self.recovery_seconds = recovery_seconds
+        self.stats: Dict[str, ModelStats] = {}
+        self.decisions: Deque[RoutingDecision] = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    def route(self, message: str, context: Optional[Dict[str, Any]] = None) -> RoutingDecision:
+        """
+        Choose the models to try for a request.
+
+        Args:
+            message: User message
+            context: Optional request context; ``model_tier`` ("fast" or
+                "quality") and ``intent`` ("story" or "question") are honored
+
+        Returns:
+            RoutingDecision with the primary model first and fallbacks after it
+        """
+        tier, reason = self._select_tier(message, context or {})
+        other = self.quality if tier is self.fast else self.fast
+        # A fallback never gets a shorter completion limit than the selected tier,
+        # so a story is not cut short when another model tells it
+        if other.max_tokens < tier.max_tokens:
+            other = ModelTier(other.name, other.model, tier.max_tokens)
+
+        if not self.is_healthy(tier.model) and self.is_healthy(other.model):
+            reason = f"{reason}; {tier.model} unhealthy"
+            tier, other = other, tier
+
+        tiers = [tier] if tier.model == other.model else [tier, other]
+        decision = RoutingDecision(tiers, reason)
+        with self._lock:
+            self.decisions.append(decision)
+        metrics.incr(f"router.routed.{tier.name}")
+        logger.info(f"Routed request to {tier.model} ({reason})")
+        return decision
+
+    def record_success(self, decision: RoutingDecision, tier: ModelTier, latency_ms: float,
+                       completion_tokens: Optional[int] = None) -> None:
+        """
+        Record a successful upstream call.
+
+        Latency is judged relative to the length of the completion, so long
+        stories do not make a model look slow.
+
+        Args:
+            decision: Decision the call belongs to
+            tier: Tier that served the call
+            latency_ms: Call latency in milliseconds
+            completion_tokens: Tokens generated (the tier's limit if unknown)
+        """
+        tokens = tier.max_tokens if completion_tokens is None else completion_tokens
+        allowed_ms = self.max_base_latency_ms + tokens * self.max_ms_per_token
+        self._stats(tier.model).record(latency_ms / allowed_ms, ok=True)
+        decision.served_by = tier.model
+        if tier is not decision.primary:
+            metrics.incr("router.fallbacks")
+
+    def record_failure(self, tier: ModelTier) -> None:
+        """
+        Record a failed upstream call.
+
+        Args:
+            tier: Tier whose call failed
+        """
+        self._stats(tier.model).record(None, ok=False)
+        metrics.incr(f"router.errors.{tier.name}")
+
+    def is_healthy(self, model: str) -> bool:
+        """
+        Check whether a model's recent error rate and relative latency are acceptable.
+
+        Args:
+            model: Upstream model identifier
+
+        Returns:
+            True if the model should receive traffic
+        """
+        with self._lock:
+            stats = self.stats.get(model)
+        if stats is None:
+            return True
+        if time.monotonic() - stats.updated_at > self.recovery_seconds:
+            # Give a model that has not been used for a while another chance
+            return True
+        if stats.error_rate > self.max_error_rate:
+            return False
+        return stats.slowness is None or stats.slowness <= 1.0
+
+    def recent_decisions(self) -> List[Dict[str, Any]]:
+        """Get the most recent routing decisions, oldest first."""
+        with self._lock:
+            return [decision.as_dict() for decision in self.decisions]
+
+    def _select_tier(self, message: str, context: Dict[str, Any]) -> Tuple[ModelTier, str]:
+        """Apply the routing policy, returning (tier, reason)."""
+        if not self.enabled:
+            return self.quality, "routing disabled"
+
+        hint = context.get("model_tier")
+        if hint == FAST_TIER:
+            return self.fast, "context hint"
+        if hint == QUALITY_TIER:
+            return self.quality, "context hint"
+
+        intent = context.get("intent")
+        if intent == "story":
+            return self.quality, "story intent (context)"
+        if intent == "question" and len(message) <= self.short_message_chars:
+            return self.fast, "question intent (context)"
+
+        if STORY_PATTERN.search(message):
+            return self.quality, "story intent"
+        if len(message) > self.short_message_chars:
+            return self.quality, "long input"
+        return self.fast, "short turn"
+
+    def _stats(self, model: str) -> ModelStats:
+        """Get (creating if needed) the statistics for a model."""
+        with self._lock:
+            return self.stats.setdefault(model, ModelStats())
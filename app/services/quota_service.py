@@ -0,0 +1,303 @@
+"""Quota Service - Per-user token and audio usage limits
+
+Usage is counted in fixed-size time buckets kept in the shared state store.
+A sliding-window check reads the window's buckets in one call, so the cost per
+request is constant regardless of how much traffic a user has sent.
+"""
+import asyncio
+import math
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.db.state_store import StateStore, get_state_store
+
+logger = get_logger(__name__)
+
+TOKENS = "tokens"
+AUDIO_SECONDS = "audio_seconds"
+
+# Response header reporting the remaining budget for each metric
+REMAINING_HEADERS = {
+    TOKENS: "X-Quota-Remaining-Tokens",
+    AUDIO_SECONDS: "X-Quota-Remaining-Audio-Seconds",
+}
+
+# Rough speaking rate used to estimate synthesized audio length
+TTS_CHARS_PER_SECOND = 15.0
+
+
+class QuotaStatus:
+    """Current usage of one user against the configured limits."""
+
+    def __init__(self, used: Dict[str, int], limits: Dict[str, int], retry_after: int):
+        """
+        Initialize a quota status.
+
+        Args:
+            used: Usage in the current window per metric
+            limits: Limit per metric
+            retry_after: Seconds until the oldest bucket leaves the window
+        """
+        self.used = used
+        self.limits = limits
+        self.retry_after = retry_after
+
+    @property
+    def remaining(self) -> Dict[str, int]:
+        """Remaining budget per metric (never negative)."""
+        return {
+            metric: max(0, limit - self.used.get(metric, 0))
+            for metric, limit in self.limits.items()
+        }
+
+    @property
+    def exceeded(self) -> bool:
+        """Whether any metric has used up its budget."""
+        return any(value <= 0 for value in self.remaining.values())
+
+    def headers(self) -> Dict[str, str]:
+        """
+        Get response headers reporting the remaining budget.
+
+        Returns:
+            Header name to value mapping
+        """
+        headers = {
+            REMAINING_HEADERS[metric]: str(value) for metric, value in self.remaining.items()
+        }
+        if self.exceeded:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class QuotaService:
+    """Records upstream usage per user and enforces sliding-window limits."""
+
+    def __init__(
+        self,
+        store: Optional[StateStore] = None,
+        enabled: bool = settings.QUOTA_ENABLED,
+        window_seconds: int = settings.QUOTA_WINDOW_SECONDS,
+        buckets: int = settings.QUOTA_BUCKETS,
+        limits: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Initialize quota service.
+
+        Args:
+            store: Shared state store holding the bucket counters
+            enabled: When False, usage is still recorded but never enforced
+            window_seconds: Length of the sliding window
+            buckets: Number of buckets the window is divided into
+            limits: Limit per metric within the window
+        """
+        self.store = store or get_state_store()
+        self.enabled = enabled
+        self.buckets = max(1, buckets)
+        self.bucket_seconds = max(1, window_seconds // self.buckets)
+        self.limits = limits or {
+            TOKENS: settings.QUOTA_MAX_TOKENS,
+            AUDIO_SECONDS: settings.QUOTA_MAX_AUDIO_SECONDS,
+        }
+        # Buckets touched since the last flush, persisted by flush()
+        self._dirty: Set[Tuple[str, str, int]] = set()
+        self._dirty_lock = threading.Lock()
+
+    async def check(self, user_id: str) -> QuotaStatus:
+        """
+        Get a user's usage in the current window.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            QuotaStatus for the user
+        """
+        current = self._bucket()
+        indexes = range(current - self.buckets + 1, current + 1)
+        metric_names = list(self.limits)
+        keys = [self._key(user_id, metric, index) for metric in metric_names for index in indexes]
+        values = await self.store.get_many(keys)
+
+        used: Dict[str, int] = {}
+        oldest_used = current
+        for position, metric in enumerate(metric_names):
+            window = values[position * self.buckets:(position + 1) * self.buckets]
+            used[metric] = sum(int(value) for value in window if value is not None)
+            for offset, value in enumerate(window):
+                if value is not None:
+                    oldest_used = min(oldest_used, indexes[offset])
+                    break
+
+        retry_after = (oldest_used + self.buckets) * self.bucket_seconds - int(time.time())
+        return QuotaStatus(used, dict(self.limits), max(1, retry_after))
+
+    def is_allowed(self, status: QuotaStatus) -> bool:
+        """
+        Check whether a request may proceed.
+
+        Args:
+            status: The user's current QuotaStatus
+
+        Returns:
+            True if the request is within budget (or quotas are disabled)
+        """
+        if not self.enabled or not status.exceeded:
+            return True
+        metrics.incr("quota.rejected")
+        return False
+
+    async def record(self, user_id: Optional[str], metric: str, amount: float) -> None:
+        """
+        Record usage for a user.
+
+        Args:
+            user_id: User identifier (usage without a user is ignored)
+            metric: TOKENS or AUDIO_SECONDS
+            amount: Amount consumed (rounded up to a whole unit)
+        """
+        if not user_id or amount <= 0:
+            return
+        bucket = self._bucket()
+        await self.store.incr(
+            self._key(user_id, metric, bucket),
+            math.ceil(amount),
+            ttl=(self.buckets + 1) * self.bucket_seconds
+        )
+        with self._dirty_lock:
+            self._dirty.add((user_id, metric, bucket))
+        metrics.incr(f"quota.{metric}", amount)
+
+    async def record_tokens(self, user_id: Optional[str], usage) -> None:
+        """
+        Record prompt and completion tokens from a completion response.
+
+        Args:
+            user_id: User identifier
+            usage: Usage object from the completion response (may be None)
+        """
+        if usage is not None:
+            tokens = (usage.prompt_tokens or 0) + (usage.completion_tokens or 0)
+            await self.record(user_id, TOKENS, tokens)
+
+    async def record_speech(self, user_id: Optional[str], text: str) -> None:
+        """
+        Record the estimated length of synthesized speech.
+
+        Args:
+            user_id: User identifier
+            text: Text that was synthesized
+        """
+        await self.record(user_id, AUDIO_SECONDS, len(text) / TTS_CHARS_PER_SECOND)
+
+    async def flush(self) -> int:
+        """
+        Persist the counters touched since the last flush through the DB layer.
+
+        Returns:
+            Number of buckets written
+        """
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return 0
+
+        dirty_list = list(dirty)
+        values = await self.store.get_many([self._key(*entry) for entry in dirty_list])
+        rows = [
+            (user_id, metric, bucket, int(value))
+            for (user_id, metric, bucket), value in zip(dirty_list, values)
+            if value is not None
+        ]
+
+        try:
+            return await asyncio.to_thread(self._save_buckets, rows, self._bucket() - self.buckets)
+        except Exception:
+            with self._dirty_lock:
+                self._dirty |= dirty
+            raise
+
+    async def restore(self) -> int:
+        """
+        Load persisted counters for the current window into the state store.
+
+        Counters already present in the store (e.g. kept by other workers) are
+        left untouched.
+
+        Returns:
+            Number of buckets restored
+        """
+        rows = await asyncio.to_thread(self._load_buckets, self._bucket() - self.buckets + 1)
+        restored = 0
+        for user_id, metric, bucket, amount in rows:
+            ttl = (bucket + self.buckets + 1) * self.bucket_seconds - time.time()
+            key = self._key(user_id, metric, bucket)
+            if ttl > 0 and await self.store.add(key, str(amount).encode(), ttl=ttl):
+                restored += 1
+        logger.info(f"Restored {restored} quota buckets")
+        return restored
+
+    async def run_flush_loop(self, interval: float = settings.QUOTA_FLUSH_SECONDS) -> None:
+        """
+        Flush counters periodically until cancelled.
+
+        Args:
+            interval: Seconds between flushes
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing quota counters: {str(e)}")
+
+    @staticmethod
+    def _save_buckets(rows: List[Tuple[str, str, int, int]], expired_before: int) -> int:
+        """Write bucket counters and drop expired ones through the quota repository."""
+        from app.db.quota_repo import QuotaRepository
+        from app.db.session import get_session_factory
+
+        db = get_session_factory()()
+        try:
+            repo = QuotaRepository(db)
+            written = repo.save_buckets(rows)
+            repo.delete_before(expired_before)
+            return written
+        finally:
+            db.close()
+
+    @staticmethod
+    def _load_buckets(since: int) -> List[Tuple[str, str, int, int]]:
+        """Read persisted bucket counters through the quota repository."""
+        from app.db.quota_repo import QuotaRepository
+        from app.db.session import get_session_factory
+
+        db = get_session_factory()()
+        try:
+            return QuotaRepository(db).load_buckets(since)
+        finally:
+            db.close()
+
+    def _bucket(self) -> int:
+        """Get the index of the current time bucket."""
+        return int(time.time()) // self.bucket_seconds
+
+    @staticmethod
+    def _key(user_id: str, metric: str, bucket: int) -> str:
+        """Get the state store key for a bucket counter."""
+        return f"quota:{user_id}:{metric}:{bucket}"
+
+
+@lru_cache(maxsize=1)
+def get_quota_service() -> QuotaService:
+    """
+    Get the shared quota service.
+
+    Returns:
+        Process-wide QuotaService instance
+    """
+    return QuotaService()
@@ -0,0 +1,296 @@
+"""Speculation Service - Precomputed replies for predictable follow-ups
+
+After a story, users mostly ask Griot to go on ("tell me more", "what happened
+next"). When enabled, the reply to the most likely follow-ups is generated in
+the background right after a response is sent and kept in the shared state
+store. If the next message of the conversation is one of them, it is answered
+from there; any other speculation for the conversation is discarded and its
+spend counted as wasted.
+"""
+import asyncio
+import json
+import re
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.core.recorder import detached
+from app.db.state_store import StateStore, get_state_store
+from app.services.model_router import STORY_PATTERN
+from app.services.quota_service import TTS_CHARS_PER_SECOND
+from app.utils.ids import conversation_scope
+
+logger = get_logger(__name__)
+
+# Follow-up name -> (message sent upstream when speculating, accepted phrasings)
+FOLLOW_UPS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "more": ("Tell me more.", (
+        "tell me more", "more", "go on", "continue", "keep going", "please continue",
+        "tell me more please", "more please",
+    )),
+    "next": ("What happened next?", (
+        "what happened next", "what happens next", "and then", "then what",
+        "then what happened", "and then what happened", "what next",
+    )),
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+metrics.register_ratio("speculation.hit_rate", "speculation.hits", "speculation.precomputed")
+metrics.register_ratio(
+    "speculation.waste_rate", "speculation.wasted_tokens", "speculation.spent_tokens"
+)
+
+# (conversation id, user id, follow-up message, context) -> (reply, model, tokens used)
+Generator = Callable[[str, str, str, Optional[Dict]], Awaitable[Tuple[str, str, int]]]
+
+
+def match_follow_up(message: str) -> Optional[str]:
+    """
+    Recognize a predictable follow-up message.
+
+    Args:
+        message: User message
+
+    Returns:
+        Follow-up name, or None if the message is not a known follow-up
+    """
+    normalized = " ".join(_PUNCTUATION.sub(" ", message.lower()).split())
+    for name, (_, phrasings) in FOLLOW_UPS.items():
+        if normalized in phrasings:
+            return name
+    return None
+
+
+class Speculation:
+    """A precomputed reply to a follow-up."""
+
+    def __init__(self, message: str, model: str, tokens: int, turn: int,
+                 audio_seconds: float = 0.0):
+        """
+        Initialize a speculation.
+
+        Args:
+            message: Precomputed reply
+            model: Model that generated it
+            tokens: Prompt and completion tokens spent
+            turn: Last conversation turn the reply was generated after
+            audio_seconds: Estimated length of speech synthesized ahead of time
+        """
+        self.message = message
+        self.model = model
+        self.tokens = tokens
+        self.turn = turn
+        self.audio_seconds = audio_seconds
+
+    def to_json(self) -> bytes:
+        """Serialize for the state store."""
+        return json.dumps(self.__dict__).encode()
+
+    @classmethod
+    def from_json(cls, raw: bytes) -> "Speculation":
+        """Deserialize from the state store."""
+        return cls(**json.loads(raw))
+
+
+class SpeculationService:
+    """Precomputes, stores and serves replies to predictable follow-ups."""
+
+    def __init__(
+        self,
+        store: Optional[StateStore] = None,
+        enabled: bool = settings.SPECULATION_ENABLED,
+        max_follow_ups: int = settings.SPECULATION_MAX_FOLLOW_UPS,
+        user_tokens_per_hour: int = settings.SPECULATION_USER_TOKENS_PER_HOUR,
+        concurrency: int = settings.SPECULATION_CONCURRENCY,
+        ttl_seconds: int = settings.SPECULATION_TTL_SECONDS,
+        tts: Optional[Callable[[str, str], Awaitable[None]]] = None,
+    ):
+        """
+        Initialize speculation service.
+
+        Args:
+            store: Shared state store holding speculations and budgets
+            enabled: When False, nothing is precomputed
+            max_follow_ups: Number of most frequent follow-ups precomputed per reply
+            user_tokens_per_hour: Per-user token budget for speculation
+            concurrency: Maximum speculations running at once in this process
+            ttl_seconds: How long an unused speculation is kept
+            tts: Optional coroutine (text, user id) synthesizing speech ahead of
+                time; the user is charged only if the speech is fetched
+        """
+        self.store = store or get_state_store()
+        self.enabled = enabled
+        self.max_follow_ups = max_follow_ups
+        self.user_tokens_per_hour = user_tokens_per_hour
+        self.concurrency = max(1, concurrency)
+        self.ttl_seconds = ttl_seconds
+        self.tts = tts
+        self._pending: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def predict(self, message: str, context: Optional[Dict] = None) -> List[str]:
+        """
+        Predict the follow-ups to a message, most frequent first.
+
+        Only story requests (including follow-ups to a story) get predictions.
+
+        Args:
+            message: User message that was just answered
+            context: Request context
+
+        Returns:
+            Follow-up names to precompute
+        """
+        if (context or {}).get("intent") != "story" and not STORY_PATTERN.search(message) \
+                and match_follow_up(message) is None:
+            return []
+        names = list(FOLLOW_UPS)
+        counts = await self.store.get_many([self._frequency_key(name) for name in names])
+        ranked = sorted(zip(names, counts), key=lambda item: -int(item[1] or 0))
+        return [name for name, _ in ranked[:self.max_follow_ups]]
+
+    async def schedule(self, conversation_id: str, user_id: str, turn: int, message: str,
+                       context: Optional[Dict], generate: Generator) -> List[asyncio.Task]:
+        """
+        Start precomputing the predicted follow-ups of a reply in the background.
+
+        Speculation is skipped when the user's budget is spent or when this
+        process is already running as many speculations as allowed, so it
+        never queues up behind (or ahead of) user traffic.
+
+        Args:
+            conversation_id: Conversation identifier
+            user_id: Owner of the conversation
+            turn: Last turn of the conversation, including the reply just sent
+            message: User message that was just answered
+            context: Request context
+            generate: Coroutine producing a reply within the conversation
+
+        Returns:
+            The started tasks
+        """
+        if not self.enabled:
+            return []
+        tasks = []
+        for follow_up in await self.predict(message, context):
+            if await self._budget_used(user_id) >= self.user_tokens_per_hour:
+                metrics.incr("speculation.skipped_budget")
+                break
+            if len(self._tasks) >= self.concurrency:
+                metrics.incr("speculation.skipped_busy")
+                break
+            task = asyncio.create_task(detached(
+                self._speculate(conversation_id, user_id, turn, follow_up, context, generate)
+            ))
+            self._tasks.add(task)
+            scope = conversation_scope(user_id, conversation_id)
+            self._pending[(scope, follow_up)] = task
+            task.add_done_callback(self._task_done(scope, follow_up))
+            tasks.append(task)
+        return tasks
+
+    async def take(self, conversation_id: str, user_id: str, message: str,
+                   turn: int) -> Optional[Speculation]:
+        """
+        Claim the precomputed reply to a message, discarding all others.
+
+        A speculation still being computed in this process for the same
+        follow-up is awaited, since it is the same upstream call the request
+        would make.
+
+        Args:
+            conversation_id: Conversation identifier
+            user_id: Owner of the conversation
+            message: Incoming user message
+            turn: Last turn of the conversation before this message
+
+        Returns:
+            The matching Speculation, or None
+        """
+        if not self.enabled:
+            return None
+        scope = conversation_scope(user_id, conversation_id)
+        follow_up = match_follow_up(message)
+        if follow_up is not None:
+            await self.store.incr(self._frequency_key(follow_up))
+            pending = self._pending.get((scope, follow_up))
+            if pending is not None:
+                await asyncio.wait([pending])
+
+        keys = [self._key(scope, name) for name in FOLLOW_UPS]
+        hit: Optional[Speculation] = None
+        for name, key, raw in zip(FOLLOW_UPS, keys, await self.store.get_many(keys)):
+            if raw is None:
+                continue
+            await self.store.delete(key)
+            speculation = Speculation.from_json(raw)
+            if name == follow_up and speculation.turn == turn:
+                hit = speculation
+            else:
+                self._wasted(speculation)
+
+        if hit is not None:
+            metrics.incr("speculation.hits")
+        elif follow_up is not None:
+            metrics.incr("speculation.misses")
+        return hit
+
+    def cancel_all(self) -> None:
+        """Cancel the speculations running in this process."""
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _speculate(self, conversation_id: str, user_id: str, turn: int, follow_up: str,
+                         context: Optional[Dict], generate: Generator) -> None:
+        """Generate and store the reply to one follow-up."""
+        try:
+            message, model, tokens = await generate(
+                conversation_id, user_id, FOLLOW_UPS[follow_up][0], context
+            )
+            await self.store.incr(self._budget_key(user_id), tokens, ttl=3600)
+            metrics.incr("speculation.precomputed")
+            metrics.incr("speculation.spent_tokens", tokens)
+            speculation = Speculation(message, model, tokens, turn)
+            if self.tts is not None:
+                await self.tts(message, user_id)
+                speculation.audio_seconds = len(message) / TTS_CHARS_PER_SECOND
+                metrics.incr("speculation.audio_seconds", speculation.audio_seconds)
+            await self.store.set(self._key(conversation_scope(user_id, conversation_id), follow_up),
+                                 speculation.to_json(), ttl=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Speculation for conversation {conversation_id} failed: {str(e)}")
+
+    def _wasted(self, speculation: Speculation) -> None:
+        """Account for a speculation that was never served."""
+        metrics.incr("speculation.discarded")
+        metrics.incr("speculation.wasted_tokens", speculation.tokens)
+        metrics.incr("speculation.wasted_audio_seconds", speculation.audio_seconds)
+
+    def _task_done(self, scope: str, follow_up: str) -> Callable[[asyncio.Task], None]:
+        """Build the callback forgetting a finished speculation task."""
+        def done(task: asyncio.Task) -> None:
+            self._tasks.discard(task)
+            if self._pending.get((scope, follow_up)) is task:
+                del self._pending[(scope, follow_up)]
+        return done
+
+    async def _budget_used(self, user_id: str) -> int:
+        """Get the tokens a user spent on speculation in the current hour."""
+        return int(await self.store.get(self._budget_key(user_id)) or 0)
+
+    @staticmethod
+    def _budget_key(user_id: str) -> str:
+        """Get the state store key for a user's hourly speculation budget."""
+        return f"speculation:budget:{user_id}:{int(time.time()) // 3600}"
+
+    @staticmethod
+    def _frequency_key(follow_up: str) -> str:
+        """Get the state store key counting how often a follow-up is asked."""
+        return f"speculation:freq:{follow_up}"
+
+    @staticmethod
+    def _key(scope: str, follow_up: str) -> str:
+        """Get the state store key for a speculated reply within a conversation scope."""
+        return f"speculation:conv:{scope}:{follow_up}"
@@ -0,0 +1,239 @@
+"""Transcode Service - Audio output profiles for TTS responses"""
+import asyncio
+import os
+import shutil
+from typing import AsyncIterator, Dict, List, Optional
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Size of reads from the encoder's output pipe
+CHUNK_SIZE = 4096
+
+
+class TranscodeError(Exception):
+    """Raised when audio cannot be transcoded."""
+
+
+class AudioProfile:
+    """An audio output format offered to clients."""
+
+    def __init__(self, name: str, media_type: str, extension: str,
+                 encoder_args: Optional[List[str]] = None):
+        """
+        Initialize an audio profile.
+
+        Args:
+            name: Profile name used in the ``format`` query parameter
+            media_type: Response media type
+            extension: File extension for downloads
+            encoder_args: ffmpeg output arguments (None to pass upstream MP3 through)
+        """
+        self.name = name
+        self.media_type = media_type
+        self.extension = extension
+        self.encoder_args = encoder_args
+
+    @property
+    def passthrough(self) -> bool:
+        """Whether the upstream audio is returned unchanged."""
+        return self.encoder_args is None
+
+
+def _mp3(bitrate: str) -> List[str]:
+    """Encoder arguments for MP3 at a constant bitrate."""
+    return ["-f", "mp3", "-codec:a", "libmp3lame", "-b:a", bitrate]
+
+
+def _opus(bitrate: str) -> List[str]:
+    """Encoder arguments for speech-tuned Opus in an Ogg container."""
+    return ["-f", "ogg", "-codec:a", "libopus", "-b:a", bitrate, "-application", "voip"]
+
+
+PROFILES: Dict[str, AudioProfile] = {
+    "mp3": AudioProfile("mp3", "audio/mpeg", "mp3"),
+    "mp3_128k": AudioProfile("mp3_128k", "audio/mpeg", "mp3", _mp3("128k")),
+    "mp3_64k": AudioProfile("mp3_64k", "audio/mpeg", "mp3", _mp3("64k")),
+    "mp3_32k": AudioProfile("mp3_32k", "audio/mpeg", "mp3", _mp3("32k")),
+    "opus_24k": AudioProfile("opus_24k", "audio/ogg; codecs=opus", "ogg", _opus("24k")),
+    "opus_16k": AudioProfile("opus_16k", "audio/ogg; codecs=opus", "ogg", _opus("16k")),
+    "pcm_16k": AudioProfile(
+        "pcm_16k", "audio/L16; rate=16000; channels=1", "pcm",
+        ["-f", "s16le", "-codec:a", "pcm_s16le", "-ar", "16000", "-ac", "1"],
+    ),
+}
+
+DEFAULT_PROFILE = "mp3"
+
+# Profile chosen for each media type a client may list in its Accept header
+ACCEPT_PROFILES: Dict[str, str] = {
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+    "audio/ogg": "opus_24k",
+    "audio/opus": "opus_24k",
+    "audio/l16": "pcm_16k",
+    "audio/pcm": "pcm_16k",
+}
+
+
+class ProfileUnavailable(ValueError):
+    """Raised when a profile that needs transcoding is requested without ffmpeg."""
+
+
+def select_profile(format: Optional[str] = None, accept: Optional[str] = None,
+                   transcoding: bool = True) -> AudioProfile:
+    """
+    Choose the output profile for a request.
+
+    Args:
+        format: Explicit profile name from the query string (takes precedence)
+        accept: Value of the Accept header
+        transcoding: Whether profiles other than the MP3 pass-through can be
+            produced; if not, they are skipped during Accept negotiation
+
+    Returns:
+        Selected AudioProfile (MP3 pass-through when nothing matches)
+
+    Raises:
+        ValueError: If an unknown profile name is requested explicitly
+        ProfileUnavailable: If a transcoded profile is requested explicitly
+            and transcoding is not available
+    """
+    if format:
+        if format not in PROFILES:
+            raise ValueError(f"Unknown audio format: {format}")
+        if not transcoding and not PROFILES[format].passthrough:
+            raise ProfileUnavailable(f"Audio format {format} is not available")
+        return PROFILES[format]
+
+    candidates = []
+    for position, part in enumerate((accept or "").split(",")):
+        fields = [field.strip() for field in part.split(";")]
+        media_type = fields[0].lower()
+        quality = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        usable = media_type in ACCEPT_PROFILES and (
+            transcoding or PROFILES[ACCEPT_PROFILES[media_type]].passthrough
+        )
+        if usable and quality > 0:
+            candidates.append((-quality, position, ACCEPT_PROFILES[media_type]))
+
+    if not candidates:
+        return PROFILES[DEFAULT_PROFILE]
+    return PROFILES[min(candidates)[2]]
+
+
+class AudioTranscoder:
+    """Transcodes upstream MP3 audio with a bounded pool of ffmpeg processes."""
+
+    def __init__(self, ffmpeg_path: Optional[str] = None, max_workers: Optional[int] = None):
+        """
+        Initialize the transcoder.
+
+        Args:
+            ffmpeg_path: ffmpeg executable (defaults to the one on PATH)
+            max_workers: Maximum concurrent encoder processes (defaults to CPU count)
+        """
+        self.ffmpeg_path = ffmpeg_path or settings.FFMPEG_PATH
+        self.max_workers = max_workers or settings.TRANSCODE_WORKERS or os.cpu_count() or 1
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def available(self) -> bool:
+        """Whether the ffmpeg executable can be found."""
+        return shutil.which(self.ffmpeg_path) is not None
+
+    async def transcode(self, audio: bytes, profile: AudioProfile) -> bytes:
+        """
+        Transcode a complete audio buffer.
+
+        Args:
+            audio: Upstream MP3 bytes
+            profile: Target profile
+
+        Returns:
+            Encoded audio bytes
+        """
+        if profile.passthrough:
+            return audio
+
+        async def single() -> AsyncIterator[bytes]:
+            yield audio
+
+        return b"".join([chunk async for chunk in self.transcode_stream(single(), profile)])
+
+    async def transcode_stream(self, chunks: AsyncIterator[bytes],
+                               profile: AudioProfile) -> AsyncIterator[bytes]:
+        """
+        Transcode audio as it arrives, yielding encoded frames as they are produced.
+
+        Encoding runs in a separate ffmpeg process so the event loop never
+        blocks; at most ``max_workers`` encoders run at once.
+
+        Args:
+            chunks: Upstream MP3 chunks
+            profile: Target profile
+
+        Yields:
+            Encoded audio chunks
+
+        Raises:
+            TranscodeError: If ffmpeg is missing or fails
+        """
+        if profile.passthrough:
+            async for chunk in chunks:
+                yield chunk
+            return
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        async with self._slots:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    self.ffmpeg_path, "-hide_banner", "-loglevel", "error",
+                    "-f", "mp3", "-i", "pipe:0", *profile.encoder_args, "pipe:1",
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+            except FileNotFoundError as e:
+                raise TranscodeError(f"ffmpeg not found: {self.ffmpeg_path}") from e
+
+            feeder = asyncio.create_task(self._feed(process, chunks))
+            try:
+                while True:
+                    data = await process.stdout.read(CHUNK_SIZE)
+                    if not data:
+                        break
+                    yield data
+                await feeder
+                stderr = await process.stderr.read()
+                if await process.wait() != 0:
+                    detail = stderr.decode(errors="replace").strip()
+                    raise TranscodeError(f"ffmpeg failed for {profile.name}: {detail}")
+            finally:
+                if not feeder.done():
+                    feeder.cancel()
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+
+    @staticmethod
+    async def _feed(process: asyncio.subprocess.Process, chunks: AsyncIterator[bytes]) -> None:
+        """Write upstream chunks to the encoder, then close its input."""
+        try:
+            async for chunk in chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # The encoder exited early; its exit status reports the problem
+            pass
+        finally:
+            process.stdin.close()
@@ -0,0 +1,77 @@
+"""Upstream Stub - OpenAI client replaying recorded latencies
+
+Used when ``UPSTREAM_STUB`` is enabled, for replaying recorded traffic without
+calling (or paying for) OpenAI. Each call sleeps for the latency recorded for
+the matching upstream call of the replayed request and returns a response of
+the recorded size; calls without a recording use ``UPSTREAM_STUB_LATENCY_MS``.
+Calls recorded as failed fail again after their latency, so fallbacks are
+replayed as they happened.
+"""
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.core.recorder import next_replayed_call
+
+# Rough characters-per-token ratio used to size stubbed completions
+CHARS_PER_TOKEN = 4
+
+
+async def _replay(name: str) -> Dict[str, Any]:
+    """Wait out the recorded latency of the next call with this name, failing it if it failed."""
+    call = next_replayed_call(name) or {"ms": settings.UPSTREAM_STUB_LATENCY_MS}
+    await asyncio.sleep(call.get("ms", 0) / 1000)
+    if call.get("ok") is False:
+        raise _replayed_error(name, call.get("status"))
+    return call
+
+
+def _replayed_error(name: str, status: Optional[int]) -> Exception:
+    """Build the error a failed call raised: its HTTP status error, or a timeout."""
+    # Deferred import, as in LLMService: only replays of failed calls need it
+    import httpx
+    from openai import APIStatusError, APITimeoutError
+
+    request = httpx.Request("POST", f"https://stub.invalid/{name}")
+    if status is None:
+        return APITimeoutError(request=request)
+    response = httpx.Response(status, request=request)
+    return APIStatusError(f"Replayed {name} failure", response=response, body=None)
+
+
+class _Completions:
+    async def create(self, model: str, messages, temperature: float = 1.0,
+                     max_tokens: int = 256, **kwargs):
+        call = await _replay("chat")
+        prompt_tokens = call.get("pt", sum(len(m["content"]) for m in messages) // CHARS_PER_TOKEN)
+        completion_tokens = call.get("ct", max_tokens // 2)
+        content = "x" * (completion_tokens * CHARS_PER_TOKEN)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                prompt_tokens_details=None,
+            ),
+        )
+
+
+class _Transcriptions:
+    async def create(self, model: str, file, **kwargs):
+        call = await _replay("transcription")
+        return SimpleNamespace(text="x" * call.get("chars", 40), duration=call.get("duration", 0.0))
+
+
+class _Speech:
+    async def create(self, model: str, voice: str, input: str, **kwargs):
+        call = await _replay("speech")
+        return SimpleNamespace(content=b"\0" * call.get("bytes", len(input) * 100))
+
+
+class StubOpenAI:
+    """Drop-in for the subset of ``AsyncOpenAI`` used by the services."""
+
+    def __init__(self):
+        """Initialize the stub client."""
+        self.chat = SimpleNamespace(completions=_Completions())
+        self.audio = SimpleNamespace(transcriptions=_Transcriptions(), speech=_Speech())
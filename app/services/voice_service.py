@@ -1,9 +1,16 @@
 """Voice Service - Speech-to-Text and Text-to-Speech"""
+import hashlib
 import io
-from typing import Optional
-from openai import AsyncOpenAI
+import time
+from typing import AsyncIterator, Optional
+from urllib.parse import quote
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.core.recorder import record_upstream, record_upstream_failure
+from app.db.state_store import StateStore, get_state_store
+from app.services.quota_service import AUDIO_SECONDS, QuotaService, get_quota_service
+from app.services.transcode_service import AudioProfile, AudioTranscoder, PROFILES, DEFAULT_PROFILE
 
 logger = get_logger(__name__)
 
@@ -11,16 +18,35 @@ logger = get_logger(__name__)
 class VoiceService:
     """Service for voice interaction - speech-to-text and text-to-speech."""
     
-    def __init__(self):
-        """Initialize voice service."""
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, store: Optional[StateStore] = None,
+                 transcoder: Optional[AudioTranscoder] = None,
+                 quotas: Optional[QuotaService] = None):
+        """
+        Initialize voice service.
+
+        Args:
+            store: Shared state store used to cache generated audio
+            transcoder: Audio transcoder for non-MP3 output profiles
+            quotas: Quota service charged with transcribed and synthesized audio
+        """
+        if settings.UPSTREAM_STUB:
+            from app.services.upstream_stub import StubOpenAI
+            self.client = StubOpenAI()
+        else:
+            # Deferred import: see LLMService.__init__
+            from openai import AsyncOpenAI
+            self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.store = store or get_state_store()
+        self.transcoder = transcoder or AudioTranscoder()
+        self.quotas = quotas or get_quota_service()
     
-    async def speech_to_text(self, audio_file: bytes) -> str:
+    async def speech_to_text(self, audio_file: bytes, user_id: Optional[str] = None) -> str:
         """
         Convert speech to text using OpenAI Whisper API.
         
         Args:
             audio_file: Audio file bytes (supports mp3, mp4, mpeg, mpga, m4a, wav, webm)
+            user_id: User charged with the transcribed audio duration
             
         Returns:
             Transcribed text
@@ -30,12 +56,22 @@ class VoiceService:
             audio_stream = io.BytesIO(audio_file)
             audio_stream.name = "audio.wav"
             
-            transcript = await self.client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_stream,
-                language="en"
-            )
+            start = time.perf_counter()
+            try:
+                transcript = await self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_stream,
+                    language="en",
+                    # verbose_json reports the audio duration for quota accounting
+                    response_format="verbose_json"
+                )
+            except Exception as e:
+                record_upstream_failure("transcription", start, e)
+                raise
+            duration = getattr(transcript, "duration", None) or 0
+            record_upstream("transcription", start, duration=duration, chars=len(transcript.text))
             
+            await self.quotas.record(user_id, AUDIO_SECONDS, duration)
             text = transcript.text
             logger.info(f"Transcribed speech to text: {text[:100]}...")
             return text
@@ -43,26 +79,155 @@ class VoiceService:
             logger.error(f"Error transcribing speech: {str(e)}")
             raise
     
-    async def text_to_speech(self, text: str, voice: str = "nova") -> bytes:
+    async def text_to_speech(self, text: str, voice: str = "nova",
+                             profile: Optional[AudioProfile] = None,
+                             user_id: Optional[str] = None) -> bytes:
         """
         Convert text to speech using OpenAI TTS API.
         
         Args:
             text: Text to convert to speech
             voice: Voice to use (alloy, echo, fable, onyx, nova, shimmer)
+            profile: Output profile (defaults to the upstream MP3)
+            user_id: User charged with synthesized audio (cache hits are free)
             
         Returns:
-            Audio file bytes (MP3 format)
+            Audio file bytes in the profile's format
+        """
+        chunks = self.stream_speech(text, voice, profile, user_id)
+        return b"".join([chunk async for chunk in chunks])
+    
+    async def stream_speech(self, text: str, voice: str = "nova",
+                            profile: Optional[AudioProfile] = None,
+                            user_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Convert text to speech, yielding encoded audio as it is produced.
+        
+        Both the upstream MP3 and each transcoded variant are cached in the
+        shared state store, so repeated requests skip synthesis and encoding.
+        
+        Args:
+            text: Text to convert to speech
+            voice: Voice to use (alloy, echo, fable, onyx, nova, shimmer)
+            profile: Output profile (defaults to the upstream MP3)
+            user_id: User charged with synthesized audio (cache hits are free)
+            
+        Yields:
+            Audio chunks in the profile's format
+        """
+        profile = profile or PROFILES[DEFAULT_PROFILE]
+        cached = await self.store.get(self._cache_key(text, voice, profile))
+        if cached is not None:
+            metrics.incr("tts.cache_hits")
+            await self._claim_prepared(text, voice, user_id)
+            yield cached
+            return
+        metrics.incr("tts.cache_misses")
+        
+        encoded = []
+        async for chunk in self.transcoder.transcode_stream(
+            self._synthesize(text, voice, user_id), profile
+        ):
+            encoded.append(chunk)
+            yield chunk
+        if not profile.passthrough:
+            # Pass-through audio was already cached by _synthesize
+            await self._cache_audio(text, voice, profile, b"".join(encoded))
+    
+    async def prepare_speech(self, text: str, user_id: str, voice: str = "nova") -> None:
         """
+        Synthesize speech ahead of time, charging it only once it is fetched.
+        
+        The upstream MP3 is cached without charging anyone and marked as
+        prepared for the user. The user's first request served from that cache
+        is charged for the speech; if it is never requested, nobody pays.
+        
+        Args:
+            text: Text to convert to speech
+            user_id: User the speech is prepared for
+            voice: Voice to use
+        """
+        async for _ in self._synthesize(text, voice):
+            pass
+        await self.store.set(
+            self._prepared_key(text, voice, user_id), b"1", ttl=settings.TTS_CACHE_TTL_SECONDS
+        )
+    
+    async def _claim_prepared(self, text: str, voice: str, user_id: Optional[str]) -> None:
+        """Charge a user for speech prepared for them, on its first cache hit."""
+        if not user_id:
+            return
+        key = self._prepared_key(text, voice, user_id)
+        if await self.store.get(key) is not None:
+            await self.store.delete(key)
+            await self.quotas.record_speech(user_id, text)
+    
+    async def _synthesize(self, text: str, voice: str,
+                          user_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Get upstream MP3 audio for text, from cache when available.
+        
+        Args:
+            text: Text to convert to speech
+            voice: Voice to use
+            user_id: User charged if the upstream is called
+            
+        Yields:
+            MP3 audio chunks
+        """
+        mp3 = PROFILES[DEFAULT_PROFILE]
+        cached = await self.store.get(self._cache_key(text, voice, mp3))
+        if cached is not None:
+            await self._claim_prepared(text, voice, user_id)
+            yield cached
+            return
+        
         try:
-            response = await self.client.audio.speech.create(
-                model="tts-1",
-                voice=voice,
-                input=text
-            )
+            start = time.perf_counter()
+            try:
+                response = await self.client.audio.speech.create(
+                    model="tts-1",
+                    voice=voice,
+                    input=text
+                )
+            except Exception as e:
+                record_upstream_failure("speech", start, e)
+                raise
+            record_upstream("speech", start, bytes=len(response.content))
             
             logger.info(f"Generated speech from text: {text[:100]}...")
-            return response.content
+            await self.quotas.record_speech(user_id, text)
         except Exception as e:
             logger.error(f"Error generating speech: {str(e)}")
             raise
+        
+        # The SDK reads the whole body before returning; the transcoder still
+        # consumes this as a stream, so a streaming upstream can be swapped in
+        audio = response.content
+        await self._cache_audio(text, voice, mp3, audio)
+        yield audio
+    
+    async def _cache_audio(self, text: str, voice: str, profile: AudioProfile,
+                           audio: bytes) -> None:
+        """Cache generated audio if it is within the size limit."""
+        if audio and len(audio) <= settings.TTS_CACHE_MAX_BYTES:
+            await self.store.set(
+                self._cache_key(text, voice, profile),
+                audio,
+                ttl=settings.TTS_CACHE_TTL_SECONDS
+            )
+    
+    @staticmethod
+    def _cache_key(text: str, voice: str, profile: AudioProfile) -> str:
+        """Get the state store key for generated audio."""
+        return f"tts:{_digest(text, voice)}:{profile.name}"
+    
+    @staticmethod
+    def _prepared_key(text: str, voice: str, user_id: str) -> str:
+        """Get the state store key marking speech prepared for a user and not yet charged."""
+        return f"tts:prepared:{quote(user_id, safe='')}:{_digest(text, voice)}"
+
+
+def _digest(text: str, voice: str) -> str:
+    """Hash the text and voice of generated audio."""
+    return hashlib.sha256(f"{voice}\0{text}".encode()).hexdigest()
@@ -1,6 +1,7 @@
 """ID Generation Utilities"""
 import uuid
 from typing import Optional
+from urllib.parse import quote
 
 
 def generate_uuid() -> str:
@@ -39,6 +40,24 @@ def generate_conversation_id(prefix: str = "conv") -> str:
     return f"{prefix}_{generate_uuid()}"
 
 
+def conversation_scope(user_id: str, conversation_id: str) -> str:
+    """
+    Build the key segment identifying a user's conversation.
+    
+    Conversation IDs are chosen by clients, so state is always namespaced by
+    the owner as well. Both parts are percent-encoded so that a ':' in either
+    cannot make two scopes collide.
+    
+    Args:
+        user_id: Owner of the conversation
+        conversation_id: Conversation identifier
+        
+    Returns:
+        Key segment of the form ``<user_id>:<conversation_id>``
+    """
+    return f"{quote(user_id, safe='')}:{quote(conversation_id, safe='')}"
+
+
 def is_valid_uuid(value: str) -> bool:
     """
     Validate if string is a valid UUID.
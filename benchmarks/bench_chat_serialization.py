@@ -0,0 +1,122 @@
+"""Chat Serialization Microbenchmark
+
+Compares the per-request cost of rendering a ChatResponse through FastAPI's
+default response_model path (validate + jsonable_encoder + JSONResponse)
+with the direct model_dump_json path used by /chat, and measures both routes
+end to end with a stubbed upstream.
+
+Usage:
+    python -m benchmarks.bench_chat_serialization [iterations]
+"""
+import asyncio
+import logging
+import sys
+import time
+from typing import Callable
+from fastapi import Depends, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.testclient import TestClient
+from fastapi.utils import create_response_field
+from app.api.deps import enforce_quota, get_llm_service, get_quota_service
+from app.db.state_store import InMemoryStateStore
+from app.main import create_app
+from app.models.chat import ChatRequest, ChatResponse
+from app.services.quota_service import QuotaService
+
+STORY = "Once upon a time in the great Mali Empire, " * 40
+
+
+class StubLLMService:
+    """LLM service returning a fixed story without calling upstream."""
+
+    async def generate_response(self, request: ChatRequest) -> ChatResponse:
+        return ChatResponse(user_id=request.user_id, message=STORY, model="stub")
+
+
+def per_call_us(func: Callable[[], object], iterations: int) -> float:
+    """Time a callable, returning microseconds per call."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench_rendering(iterations: int) -> None:
+    """Benchmark response rendering in isolation."""
+    response = ChatResponse(user_id="user123", message=STORY, model="stub")
+    field = create_response_field(name="bench", type_=ChatResponse)
+    loop = asyncio.new_event_loop()
+
+    def default_path() -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=response, is_coroutine=True)
+        )
+        return JSONResponse(jsonable_encoder(content)).body
+
+    def direct_path() -> bytes:
+        return Response(content=response.model_dump_json(), media_type="application/json").body
+
+    default_us = per_call_us(default_path, iterations)
+    direct_us = per_call_us(direct_path, iterations)
+    loop.close()
+    print(f"render  response_model+jsonable_encoder: {default_us:8.1f} us/req")
+    print(f"render  model_dump_json:                 {direct_us:8.1f} us/req")
+    print(f"render  saving:                          {default_us - direct_us:8.1f} us/req "
+          f"({(1 - direct_us / default_us) * 100:.0f}%)")
+
+
+def bench_end_to_end(iterations: int) -> None:
+    """Benchmark the default and optimized chat routes with a stubbed upstream."""
+    app = create_app()
+    stub = StubLLMService()
+    quotas = QuotaService(store=InMemoryStateStore())
+
+    async def get_stub_service() -> StubLLMService:
+        return stub
+
+    async def get_bench_quotas() -> QuotaService:
+        return quotas
+
+    app.dependency_overrides[get_llm_service] = get_stub_service
+    app.dependency_overrides[get_quota_service] = get_bench_quotas
+
+    # Same app, middleware and quota handling as /chat, but rendered through the
+    # default response_model path, so the routes differ only in rendering
+    @app.post("/bench/default-chat", response_model=ChatResponse, response_class=JSONResponse)
+    async def default_chat(request: ChatRequest, response: Response,
+                           quotas: QuotaService = Depends(get_quota_service)) -> ChatResponse:
+        await enforce_quota(quotas, request.user_id)
+        reply = await stub.generate_response(request)
+        response.headers.update((await quotas.check(request.user_id)).headers())
+        return reply
+
+    payload = {
+        "user_id": "user123", "message": "Tell me a story", "context": {"mood": "educational"}
+    }
+    with TestClient(app) as client:
+        for path in ("/bench/default-chat", "/api/v1/chat"):
+            assert client.post(path, json=payload).status_code == 200
+        # Interleave rounds so drift affects both routes equally
+        default_us = optimized_us = 0.0
+        rounds = 5
+        for _ in range(rounds):
+            default_us += per_call_us(
+                lambda: client.post("/bench/default-chat", json=payload), iterations // rounds
+            ) / rounds
+            optimized_us += per_call_us(
+                lambda: client.post("/api/v1/chat", json=payload), iterations // rounds
+            ) / rounds
+
+    print(f"e2e     default route:                   {default_us:8.1f} us/req")
+    print(f"e2e     optimized /api/v1/chat:          {optimized_us:8.1f} us/req")
+    print(f"e2e     saving:                          {default_us - optimized_us:8.1f} us/req")
+
+
+if __name__ == "__main__":
+    # Keep per-request logging out of the measurement
+    logging.disable(logging.INFO)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    bench_rendering(count * 10)
+    bench_end_to_end(count)
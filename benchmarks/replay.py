@@ -0,0 +1,240 @@
+"""Traffic Replay Harness
+
+Reissues traffic recorded with ``RECORDER_PATH`` against a running instance,
+keeping the original inter-arrival times (optionally compressed), and compares
+the latency and throughput of two replay runs.
+
+Start the instance under test with the upstream stub so that OpenAI is not
+called and every upstream call takes as long as it did when recorded:
+
+    UPSTREAM_STUB=true ./run.sh prod
+
+Usage:
+    python -m benchmarks.replay run traffic.jsonl --target http://localhost:8000 \\
+        [--speed 10] [--limit 1000] --out before.jsonl
+    python -m benchmarks.replay compare before.jsonl after.jsonl
+"""
+import argparse
+import asyncio
+import json
+import math
+import statistics
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+import httpx
+from app.core.recorder import REPLAY_HEADER
+
+# Form field carrying audio uploads (see app/api/v1/voice.py)
+AUDIO_FIELD = "audio"
+
+
+def load_records(paths: Iterable[str], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Load recorded requests from one or more logs, ordered by arrival.
+
+    Background records are skipped; replayed requests start that work again.
+
+    Args:
+        paths: Recorder log files (e.g. one per host)
+        limit: Maximum number of requests to keep
+
+    Returns:
+        Records sorted by timestamp
+    """
+    records = []
+    for path in paths:
+        with open(path, "rb") as log:
+            records.extend(json.loads(line) for line in log if line.strip())
+    records = [record for record in records if not record.get("bg")]
+    records.sort(key=lambda record: record["ts"])
+    return records[:limit] if limit else records
+
+
+def build_request(client: httpx.AsyncClient, record: Dict[str, Any]) -> httpx.Request:
+    """
+    Rebuild an HTTP request from a record.
+
+    JSON bodies are replayed as recorded; uploads, whose content is not
+    recorded, are replaced by a zero-filled file of the recorded size.
+
+    Args:
+        client: Client the request will be sent with
+        record: Recorded request
+
+    Returns:
+        Request carrying the recorded upstream calls in the replay header
+    """
+    url = record["path"] + (f"?{record['query']}" if record["query"] else "")
+    headers = {REPLAY_HEADER: json.dumps(record["up"], separators=(",", ":"))}
+    ctype = record["ctype"].lower()
+    if record["body"] is not None:
+        return client.build_request(record["method"], url, json=record["body"], headers=headers)
+    if ctype.startswith("multipart/"):
+        files = {AUDIO_FIELD: ("audio.wav", b"\0" * record["size"], "audio/wav")}
+        return client.build_request(record["method"], url, files=files, headers=headers)
+    if record["size"]:
+        headers["content-type"] = record["ctype"]
+        content = b"\0" * record["size"]
+        return client.build_request(record["method"], url, content=content, headers=headers)
+    return client.build_request(record["method"], url, headers=headers)
+
+
+async def replay(records: List[Dict[str, Any]], client: httpx.AsyncClient,
+                 speed: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    Replay records with their original inter-arrival times.
+
+    Args:
+        records: Records sorted by timestamp
+        client: Client bound to the instance under test
+        speed: Time compression factor (2 replays twice as fast; 0 sends
+            everything at once)
+
+    Returns:
+        One result per request: path, offset and latency in ms, status
+    """
+    if not records:
+        return []
+    origin = records[0]["ts"]
+    start = time.perf_counter()
+
+    async def send(record: Dict[str, Any]) -> Dict[str, Any]:
+        if speed > 0:
+            delay = (record["ts"] - origin) / speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        sent = time.perf_counter()
+        try:
+            response = await client.send(build_request(client, record))
+            await response.aread()
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        done = time.perf_counter()
+        return {
+            "path": record["path"],
+            "offset_ms": round((sent - start) * 1000, 1),
+            "ms": round((done - sent) * 1000, 1),
+            "status": status,
+            "recorded_ms": record["ms"],
+        }
+
+    return list(await asyncio.gather(*(send(record) for record in records)))
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Compute latency percentiles, error rate and throughput per path and overall.
+
+    Args:
+        results: Replay results
+
+    Returns:
+        Mapping of path (and ``all``) to its statistics
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for result in results:
+        groups["all"].append(result)
+        groups[result["path"]].append(result)
+
+    summary = {}
+    for path, group in groups.items():
+        latencies = sorted(result["ms"] for result in group)
+        first = min(result["offset_ms"] for result in group)
+        last = max(result["offset_ms"] + result["ms"] for result in group)
+        summary[path] = {
+            "requests": len(group),
+            "errors": sum(1 for result in group if not 200 <= result["status"] < 400) / len(group),
+            "mean_ms": statistics.fmean(latencies),
+            "p50_ms": percentile(latencies, 50),
+            "p90_ms": percentile(latencies, 90),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": latencies[-1],
+            "rps": len(group) / max((last - first) / 1000, 1e-9),
+        }
+    return summary
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    index = max(0, math.ceil(pct / 100 * len(values)) - 1)
+    return values[index]
+
+
+def compare(before: List[Dict[str, Any]], after: List[Dict[str, Any]]) -> str:
+    """
+    Render a comparison report of two replay runs.
+
+    Args:
+        before: Results of the baseline run
+        after: Results of the candidate run
+
+    Returns:
+        Plain-text report with relative changes
+    """
+    base, candidate = summarize(before), summarize(after)
+    lines = []
+    for path in ["all"] + sorted(set(base) & set(candidate) - {"all"}):
+        counts = f"{base[path]['requests']} vs {candidate[path]['requests']} requests"
+        lines.append(f"{path}  ({counts})")
+        for metric in ("mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms", "rps", "errors"):
+            old, new = base[path][metric], candidate[path][metric]
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            lines.append(f"  {metric:<8} {old:>10.2f} {new:>10.2f}  {change}")
+    return "\n".join(lines)
+
+
+def read_results(path: str) -> List[Dict[str, Any]]:
+    """Read replay results written by the ``run`` command."""
+    with open(path) as results:
+        return [json.loads(line) for line in results if line.strip()]
+
+
+async def run_replay(args: argparse.Namespace) -> None:
+    """Replay a recording against the target and write the results."""
+    records = load_records(args.logs, args.limit)
+    limits = httpx.Limits(max_connections=args.connections)
+    async with httpx.AsyncClient(
+        base_url=args.target, timeout=args.timeout, limits=limits
+    ) as client:
+        results = await replay(records, client, args.speed)
+    with open(args.out, "w") as out:
+        out.writelines(json.dumps(result) + "\n" for result in results)
+    summary = summarize(results)["all"] if results else {}
+    print(f"Replayed {len(results)} requests to {args.target}: "
+          + ", ".join(f"{key}={value:.2f}" for key, value in summary.items()))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the replay command line."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="replay recorded traffic")
+    run.add_argument("logs", nargs="+", help="recorder log files")
+    run.add_argument("--target", default="http://localhost:8000", help="base URL of the instance")
+    run.add_argument(
+        "--speed", type=float, default=1.0, help="time compression factor (0 = no delays)"
+    )
+    run.add_argument("--limit", type=int, default=None, help="replay only the first N requests")
+    run.add_argument("--connections", type=int, default=100, help="maximum open connections")
+    run.add_argument("--timeout", type=float, default=120.0, help="request timeout in seconds")
+    run.add_argument("--out", required=True, help="file receiving the replay results")
+
+    report = commands.add_parser("compare", help="compare two replay runs")
+    report.add_argument("before", help="baseline results")
+    report.add_argument("after", help="candidate results")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        asyncio.run(run_replay(args))
+    else:
+        print(compare(read_results(args.before), read_results(args.after)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,24 @@
+"""Gunicorn Configuration - Production multi-worker mode"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+# Uvicorn worker that drains in-flight requests before exiting
+worker_class = "app.core.workers.GriotWorker"
+
+# Async workers are I/O bound, so one worker per core is enough
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# Workers must share caches, memory and counters, so default to the
+# cross-process backend (workers inherit this environment)
+os.environ.setdefault("STATE_BACKEND", "sqlite")
+
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+# Workers are killed after graceful_timeout, so leave room for the drain
+# deadline plus the final flushes
+graceful_timeout = int(os.getenv(
+    "GRACEFUL_TIMEOUT", int(float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "20"))) + 10
+))
+keepalive = 5
+accesslog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
@@ -1,5 +1,10 @@
 #!/bin/bash
 # Run script for Griot Backend
+#
+# Usage:
+#   ./run.sh          Development server (single process, auto-reload)
+#   ./run.sh prod     Production server (gunicorn, one worker per core;
+#                     set WEB_CONCURRENCY to override the worker count)
 
 # Exit on any error
 set -e
@@ -23,5 +28,10 @@ echo "Installing dependencies..."
 pip install -r requirements.txt
 
 # Run the application
+if [ "$1" = "prod" ]; then
+    echo "Starting Griot Backend (production, multi-worker)..."
+    exec gunicorn app.main:app -c gunicorn.conf.py
+fi
+
 echo "Starting Griot Backend..."
 python -m uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
@@ -0,0 +1,17 @@
+"""Shared Test Fixtures"""
+import pytest
+from app.core.config import settings
+from app.db import session as db_session
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Point the configured database at a fresh temporary file with all tables created."""
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{tmp_path / 'griot.db'}")
+    db_session.get_engine.cache_clear()
+    db_session.get_session_factory.cache_clear()
+    db_session.init_db()
+    yield settings.DATABASE_URL
+    db_session.get_engine().dispose()
+    db_session.get_engine.cache_clear()
+    db_session.get_session_factory.cache_clear()
@@ -0,0 +1,164 @@
+"""Audio Output Profile Tests"""
+import asyncio
+import shutil
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+from app.api.deps import get_llm_service, get_quota_service, get_voice_service
+from app.db.state_store import InMemoryStateStore
+from app.main import app
+from app.services.quota_service import QuotaService
+from app.services.transcode_service import (
+    AudioTranscoder, PROFILES, ProfileUnavailable, select_profile
+)
+from app.services.voice_service import VoiceService
+
+
+def test_select_profile_from_format_and_accept():
+    """The format parameter wins; otherwise the best Accept match is used."""
+    assert select_profile("opus_16k", "audio/mpeg").name == "opus_16k"
+    assert select_profile(None, "audio/ogg").name == "opus_24k"
+    assert select_profile(None, "audio/mpeg;q=0.5, audio/L16;q=0.9").name == "pcm_16k"
+    assert select_profile(None, "*/*").name == "mp3"
+    assert select_profile(None, None).name == "mp3"
+    with pytest.raises(ValueError):
+        select_profile("flac", None)
+
+
+def test_select_profile_without_transcoding():
+    """Without ffmpeg, negotiation falls back to MP3 and named transcoded formats are refused."""
+    assert select_profile(None, "audio/ogg, audio/mpeg;q=0.5", transcoding=False).name == "mp3"
+    assert select_profile(None, "audio/ogg", transcoding=False).name == "mp3"
+    assert select_profile("mp3", None, transcoding=False).name == "mp3"
+    with pytest.raises(ProfileUnavailable):
+        select_profile("opus_24k", None, transcoding=False)
+
+
+class FakeTranscoder(AudioTranscoder):
+    """Transcoder that tags audio instead of running ffmpeg."""
+
+    async def transcode_stream(self, chunks, profile):
+        async for chunk in chunks:
+            yield chunk if profile.passthrough else profile.name.encode() + b":" + chunk
+
+
+def make_voice_service():
+    """Create a voice service with a counting fake TTS upstream."""
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(content=b"mp3-audio")
+
+    service = VoiceService(store=InMemoryStateStore(), transcoder=FakeTranscoder())
+    service.client = SimpleNamespace(audio=SimpleNamespace(speech=SimpleNamespace(create=create)))
+    return service, calls
+
+
+def test_transcoded_variants_are_cached():
+    """Upstream audio is synthesized once and each variant is cached."""
+    service, calls = make_voice_service()
+
+    async def run():
+        opus = await service.text_to_speech("Hello", "nova", PROFILES["opus_24k"])
+        again = await service.text_to_speech("Hello", "nova", PROFILES["opus_24k"])
+        pcm = await service.text_to_speech("Hello", "nova", PROFILES["pcm_16k"])
+        mp3 = await service.text_to_speech("Hello", "nova")
+        return opus, again, pcm, mp3
+
+    opus, again, pcm, mp3 = asyncio.run(run())
+    assert opus == again == b"opus_24k:mp3-audio"
+    assert pcm == b"pcm_16k:mp3-audio"
+    assert mp3 == b"mp3-audio"
+    assert len(calls) == 1
+
+
+class StubVoiceService:
+    """Voice service returning a fixed transcript."""
+
+    def __init__(self, transcript: str):
+        self.transcript = transcript
+        self.transcoder = FakeTranscoder()
+
+    async def speech_to_text(self, audio_file, user_id=None):
+        return self.transcript
+
+
+class UnusedLLMService:
+    """LLM service that must not be reached."""
+
+    async def generate_response(self, request):
+        raise AssertionError("no response should be generated")
+
+
+@pytest.mark.parametrize("transcript", ["", "   ", "x" * 5000], ids=["empty", "blank", "long"])
+def test_unusable_transcript_is_rejected(transcript):
+    """Silent clips and overlong transcripts are client errors, not server errors."""
+    async def voice_service():
+        return StubVoiceService(transcript)
+
+    async def llm_service():
+        return UnusedLLMService()
+
+    async def quota_service():
+        return QuotaService(store=InMemoryStateStore())
+
+    app.dependency_overrides.update({
+        get_voice_service: voice_service,
+        get_llm_service: llm_service,
+        get_quota_service: quota_service,
+    })
+    try:
+        response = TestClient(app).post(
+            "/api/v1/voice", params={"user_id": "alice"}, files={"audio": ("clip.wav", b"\0" * 64)}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 422
+
+
+def test_missing_ffmpeg_serves_acceptable_mp3():
+    """Without ffmpeg, clients accepting MP3 get it; a named transcoded format gets 406."""
+    service, _ = make_voice_service()
+    service.transcoder = AudioTranscoder(ffmpeg_path="no-such-ffmpeg")
+
+    async def voice_service():
+        return service
+
+    async def quota_service():
+        return QuotaService(store=InMemoryStateStore())
+
+    app.dependency_overrides.update(
+        {get_voice_service: voice_service, get_quota_service: quota_service}
+    )
+    try:
+        client = TestClient(app)
+        negotiated = client.post(
+            "/api/v1/voice/text", params={"text": "Hello", "user_id": "alice"},
+            headers={"Accept": "audio/ogg, audio/mpeg"},
+        )
+        named = client.post(
+            "/api/v1/voice/text", params={"text": "Hello", "user_id": "alice", "format": "opus_24k"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert negotiated.status_code == 200
+    assert negotiated.headers["content-type"] == "audio/mpeg"
+    assert negotiated.content == b"mp3-audio"
+    assert named.status_code == 406
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_ffmpeg_transcodes_to_pcm():
+    """A real encoder turns MP3 into raw PCM."""
+    async def run():
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-loglevel", "error", "-f", "lavfi", "-i", "sine=duration=1",
+            "-f", "mp3", "pipe:1", stdout=asyncio.subprocess.PIPE,
+        )
+        mp3, _ = await process.communicate()
+        return await AudioTranscoder(max_workers=1).transcode(mp3, PROFILES["pcm_16k"])
+
+    pcm = asyncio.run(run())
+    # One second of 16 kHz mono 16-bit audio, give or take encoder padding
+    assert abs(len(pcm) - 32000) < 4000
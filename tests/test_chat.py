@@ -1,11 +1,33 @@
 """Chat API Tests"""
 import pytest
 from fastapi.testclient import TestClient
+from app.api.deps import get_llm_service
 from app.main import app
+from app.models.chat import ChatRequest, ChatResponse
 
 client = TestClient(app)
 
 
+class StubLLMService:
+    """LLM service that echoes the request without calling upstream."""
+
+    async def generate_response(self, request: ChatRequest) -> ChatResponse:
+        message = f"echo: {request.message}"
+        return ChatResponse(user_id=request.user_id, message=message, model="stub")
+
+
+async def get_stub_llm_service() -> StubLLMService:
+    return StubLLMService()
+
+
+@pytest.fixture
+def stub_client():
+    """Client whose chat requests are served by the stub LLM service."""
+    app.dependency_overrides[get_llm_service] = get_stub_llm_service
+    yield client
+    app.dependency_overrides.clear()
+
+
 def test_health_check():
     """Test health check endpoint."""
     response = client.get("/api/v1/health")
@@ -25,5 +47,54 @@ def test_chat_endpoint():
     # assert "message" in response.json()
 
 
+
+def test_chat_response_rendering(stub_client):
+    """The chat response is rendered directly from the model."""
+    payload = {"user_id": "test_user", "message": "Hi", "context": {"mood": "playful"}}
+    response = stub_client.post("/api/v1/chat", json=payload)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    data = response.json()
+    assert data["message"] == "echo: Hi"
+    assert data["model"] == "stub"
+    assert "timestamp" in data
+
+
+def test_chat_context_is_typed(stub_client):
+    """Unknown or invalid context hints are rejected."""
+    payload = {"user_id": "test_user", "message": "Hi", "context": {"unknown": "x"}}
+    assert stub_client.post("/api/v1/chat", json=payload).status_code == 422
+    payload["context"] = {"model_tier": "huge"}
+    assert stub_client.post("/api/v1/chat", json=payload).status_code == 422
+
+
+def test_oversized_payload_rejected(stub_client):
+    """Bodies over the JSON limit are rejected before parsing."""
+    payload = {"user_id": "test_user", "message": "x" * 100_000}
+    assert stub_client.post("/api/v1/chat", json=payload).status_code == 413
+
+    def chunked():
+        yield b'{"user_id": "test_user", "message": "'
+        yield b"x" * 100_000
+        yield b'"}'
+
+    response = stub_client.post(
+        "/api/v1/chat", content=chunked(), headers={"content-type": "application/json"}
+    )
+    assert response.status_code == 413
+
+
+def test_untyped_body_gets_json_limit(stub_client):
+    """A body without a Content-Type is parsed as JSON, so it gets the JSON limit."""
+    body = b'{"user_id": "test_user", "message": "Hi", "pad": "' + b"x" * 100_000 + b'"}'
+    assert stub_client.post("/api/v1/chat", content=body).status_code == 413
+
+
+def test_unknown_fields_are_rejected(stub_client):
+    """Unknown top-level fields are rejected rather than parsed and ignored."""
+    payload = {"user_id": "test_user", "message": "Hi", "pad": "x"}
+    assert stub_client.post("/api/v1/chat", json=payload).status_code == 422
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
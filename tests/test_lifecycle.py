@@ -0,0 +1,102 @@
+"""Graceful Shutdown Tests"""
+import asyncio
+from app.core.lifecycle import InFlightMiddleware, Lifecycle
+
+
+class SlowApp:
+    """ASGI app whose responses wait on a simulated upstream call."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.cancelled = 0
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"done"})
+
+
+async def serve(app, sent):
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http"}, receive, send)
+
+
+def start_requests(lifecycle, upstream, count, sent):
+    app = InFlightMiddleware(upstream, lifecycle)
+    return [asyncio.create_task(serve(app, sent)) for _ in range(count)]
+
+
+def test_drain_waits_for_in_flight_requests():
+    """Readiness fails at once; requests finishing before the deadline complete."""
+    async def scenario():
+        lifecycle = Lifecycle(drain_seconds=2)
+        lifecycle.started()
+        lifecycle.ready = True
+        sent = []
+        requests = start_requests(lifecycle, SlowApp(0.1), 3, sent)
+        await asyncio.sleep(0)
+        assert lifecycle.in_flight == 3
+
+        drain = asyncio.create_task(lifecycle.drain())
+        await asyncio.sleep(0)
+        assert not lifecycle.ready
+        assert await drain == 0
+        await asyncio.gather(*requests)
+        return sent
+
+    sent = asyncio.run(scenario())
+    starts = [message for message in sent if message["type"] == "http.response.start"]
+    assert len(starts) == 3
+    assert all((b"connection", b"close") in message["headers"] for message in starts)
+
+
+def test_requests_past_deadline_are_cancelled():
+    """Upstream calls still running at the deadline are cancelled."""
+    async def scenario():
+        lifecycle = Lifecycle(drain_seconds=0.05)
+        lifecycle.started()
+        upstream = SlowApp(60)
+        sent = []
+        requests = start_requests(lifecycle, upstream, 2, sent)
+        await asyncio.sleep(0)
+        cancelled = await lifecycle.drain()
+        await asyncio.gather(*requests, return_exceptions=True)
+        return cancelled, upstream.cancelled, lifecycle.in_flight, sent
+
+    cancelled, upstream_cancelled, in_flight, sent = asyncio.run(scenario())
+    assert (cancelled, upstream_cancelled, in_flight) == (2, 2, 0)
+    starts = [message for message in sent if message["type"] == "http.response.start"]
+    assert [message["status"] for message in starts] == [503, 503]
+
+
+def test_shutdown_stops_tasks_and_runs_hooks():
+    """Background tasks are cancelled and every hook runs, even after a failure."""
+    calls = []
+
+    async def failing_hook():
+        calls.append("failing")
+        raise RuntimeError("flush failed")
+
+    async def flush_hook():
+        calls.append("flush")
+
+    async def scenario():
+        lifecycle = Lifecycle(drain_seconds=1)
+        lifecycle.on_shutdown("failing", failing_hook)
+        lifecycle.on_shutdown("flush", flush_hook)
+        lifecycle.started()
+        loop_task = lifecycle.spawn(asyncio.sleep(60), "loop")
+        await lifecycle.shutdown()
+        return loop_task.cancelled()
+
+    assert asyncio.run(scenario())
+    assert calls == ["failing", "flush"]
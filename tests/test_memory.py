@@ -0,0 +1,151 @@
+"""Conversation Memory Tests"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.db import state_store
+from app.db.state_store import InMemoryStateStore
+from app.prompts.templates import PromptRegistry
+from app.services.memory_service import MemoryService
+
+
+class RecordingSummarizer:
+    """Summarizer that records what it was asked to fold in."""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = []
+        self.delay = delay
+
+    async def __call__(self, previous_summary, turns, user_id):
+        self.calls.append((previous_summary, [turn["seq"] for turn in turns]))
+        await asyncio.sleep(self.delay)
+        covered = f"turns {turns[0]['seq']}-{turns[-1]['seq']}"
+        return f"{previous_summary}; {covered}" if previous_summary else covered
+
+
+pytestmark = pytest.mark.usefixtures("database")
+
+
+def make_service(summarizer, store=None):
+    """Create a memory service that compacts after a few short turns."""
+    return MemoryService(
+        store=store or InMemoryStateStore(),
+        summarizer=summarizer,
+        trigger_tokens=10,
+        keep_recent_turns=2,
+    )
+
+
+def add_exchanges(memory, count, start=0):
+    """Add numbered question and answer pairs to alice's conversation."""
+    async def add():
+        for index in range(start, start + count):
+            await memory._add_turn("conv", "alice", "user", f"question number {index}")
+            await memory._add_turn("conv", "alice", "assistant", f"answer number {index}")
+
+    asyncio.run(add())
+
+
+def test_compaction_extends_summary_incrementally():
+    """Each compaction only sends turns newer than the existing summary."""
+    summarizer = RecordingSummarizer()
+    memory = make_service(summarizer)
+
+    add_exchanges(memory, 3)
+    assert asyncio.run(memory.compact("conv", "alice"))
+    add_exchanges(memory, 3, start=3)
+    assert asyncio.run(memory.compact("conv", "alice"))
+
+    assert summarizer.calls == [
+        (None, [1, 2, 3, 4]),
+        ("turns 1-4", [5, 6, 7, 8, 9, 10]),
+    ]
+    summary, turns = asyncio.run(memory.get_conversation("conv", "alice"))
+    assert summary == "turns 1-4; turns 5-10"
+    assert turns == [
+        {"role": "user", "content": "question number 5"},
+        {"role": "assistant", "content": "answer number 5"},
+    ]
+
+
+def test_short_conversations_are_not_compacted():
+    """Nothing is summarized until the unsummarized turns exceed the trigger."""
+    summarizer = RecordingSummarizer()
+    memory = make_service(summarizer)
+    asyncio.run(memory._add_turn("conv", "alice", "user", "hi"))
+
+    assert not asyncio.run(memory.compact("conv", "alice"))
+    assert summarizer.calls == []
+
+
+def test_concurrent_compactions_summarize_once():
+    """Workers sharing a store do not fold the same turns twice."""
+    summarizer = RecordingSummarizer(delay=0.05)
+    store = InMemoryStateStore()
+    workers = [make_service(summarizer, store) for _ in range(3)]
+    add_exchanges(workers[0], 3)
+
+    async def run_all():
+        return await asyncio.gather(*(worker.compact("conv", "alice") for worker in workers))
+
+    assert sorted(asyncio.run(run_all())) == [False, False, True]
+    assert len(summarizer.calls) == 1
+    # A stale compaction built from an outdated summary is discarded
+    assert not workers[0]._save_summary("conv", "alice", "stale", 4, 0)
+
+
+def test_conversations_are_scoped_by_owner():
+    """Another user sending the same conversation ID sees none of its history."""
+    summarizer = RecordingSummarizer()
+    memory = make_service(summarizer)
+    add_exchanges(memory, 3)
+    assert asyncio.run(memory.compact("conv", "alice"))
+
+    assert asyncio.run(memory.get_conversation("conv", "bob")) == (None, [])
+    assert asyncio.run(memory.last_turn("conv", "bob")) == 0
+    asyncio.run(memory.record_exchange("conv", "bob", "hello", "welcome"))
+
+    summary, turns = asyncio.run(memory.get_conversation("conv", "alice"))
+    assert summary == "turns 1-4"
+    assert [turn["content"] for turn in turns] == ["question number 2", "answer number 2"]
+    assert asyncio.run(memory.get_conversation("conv", "bob"))[1] == [
+        {"role": "user", "content": "hello"},
+        {"role": "assistant", "content": "welcome"},
+    ]
+
+
+def test_prompt_includes_summary_and_recent_turns():
+    """The summary message sits between the prefix and the recent turns."""
+    registry = PromptRegistry()
+    history = [{"role": "user", "content": "earlier"}, {"role": "assistant", "content": "reply"}]
+    messages = registry.build_messages("next", history=history, summary="They met Sundiata.")
+
+    assert messages[0] == registry.prefix()
+    assert "They met Sundiata." in messages[1]["content"]
+    assert messages[2:] == history + [{"role": "user", "content": "next"}]
+
+
+def test_turn_counter_survives_daily_use_and_restarts_past_summary(monkeypatch):
+    """The counter lives as long as the turns, and a restarted one skips summarized numbers."""
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(state_store, "time", SimpleNamespace(time=lambda: clock.now))
+    memory = make_service(RecordingSummarizer())
+    add_exchanges(memory, 3)
+    assert asyncio.run(memory.compact("conv", "alice"))
+
+    for day in range(10):
+        clock.now += 24 * 60 * 60
+        add_exchanges(memory, 1, start=3 + day)
+    assert asyncio.run(memory.last_turn("conv", "alice")) == 26
+    _, turns = asyncio.run(memory.get_conversation("conv", "alice"))
+    assert turns[-1] == {"role": "assistant", "content": "answer number 12"}
+
+    # After a week without activity the turns and their counter are gone, the summary is not
+    clock.now += 8 * 24 * 60 * 60
+    add_exchanges(memory, 1, start=100)
+    summary, turns = asyncio.run(memory.get_conversation("conv", "alice"))
+    assert summary == "turns 1-4"
+    assert turns == [
+        {"role": "user", "content": "question number 100"},
+        {"role": "assistant", "content": "answer number 100"},
+    ]
+    assert asyncio.run(memory.last_turn("conv", "alice")) == 6
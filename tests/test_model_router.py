@@ -0,0 +1,140 @@
+"""Model Router Tests"""
+import asyncio
+from types import SimpleNamespace
+import httpx
+import openai
+import pytest
+from fastapi.testclient import TestClient
+from app.api.deps import get_llm_service
+from app.db.state_store import InMemoryStateStore
+from app.main import app
+from app.models.chat import ChatRequest
+from app.services.llm_service import LLMService
+from app.services.memory_service import MemoryService
+from app.services.model_router import ModelRouter, ModelTier, is_retryable
+from app.services.quota_service import QuotaService
+
+
+def make_router(**kwargs) -> ModelRouter:
+    """Create a router with distinct fast and quality models."""
+    return ModelRouter(
+        fast=ModelTier("fast", "fast-model", 600),
+        quality=ModelTier("quality", "quality-model", 2000),
+        enabled=True,
+        short_message_chars=200,
+        **kwargs,
+    )
+
+
+def test_short_turn_uses_fast_model():
+    """Greetings and quick questions go to the fast model."""
+    decision = make_router().route("Hello, Griot!")
+    assert decision.primary.model == "fast-model"
+    assert [tier.model for tier in decision.tiers] == ["fast-model", "quality-model"]
+
+
+def test_story_and_long_input_use_quality_model():
+    """Storytelling intent and long inputs go to the quality model."""
+    router = make_router()
+    assert router.route("Tell me a story about Mali").primary.model == "quality-model"
+    assert router.route("x" * 500).primary.model == "quality-model"
+
+
+def test_context_hints_override_policy():
+    """Context hints take precedence over message heuristics."""
+    router = make_router()
+    assert router.route("Tell me a story", {"model_tier": "fast"}).primary.model == "fast-model"
+    assert router.route("Hi", {"intent": "story"}).primary.model == "quality-model"
+
+
+def test_unhealthy_model_is_avoided():
+    """A model with a high error rate is routed around and recorded."""
+    router = make_router(max_error_rate=0.3)
+    for _ in range(5):
+        router.record_failure(router.fast)
+    decision = router.route("Hello")
+    assert decision.primary.model == "quality-model"
+    assert "unhealthy" in decision.reason
+    assert router.recent_decisions()[-1]["model"] == "quality-model"
+
+
+def test_recent_decisions_are_exposed():
+    """The router's recent decisions are served next to the metrics."""
+    router = make_router()
+    router.route("Hello")
+    router.route("Tell me a story")
+
+    async def llm_service():
+        return SimpleNamespace(router=router)
+
+    app.dependency_overrides[get_llm_service] = llm_service
+    try:
+        response = TestClient(app).get("/api/v1/metrics/routing")
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert [decision["model"] for decision in response.json()] == ["fast-model", "quality-model"]
+    assert response.json()[1]["reason"] == "story intent"
+
+
+def test_long_story_does_not_make_quality_model_unhealthy():
+    """Latency is judged per completion token, so a slow long story is not held against gpt-4."""
+    router = make_router()
+    decision = router.route("Tell me a story about Sundiata")
+    router.record_success(decision, decision.primary, 18000, completion_tokens=2000)
+    decision = router.route("Tell me a story about Sundiata")
+    assert decision.primary.model == "quality-model"
+    assert decision.reason == "story intent"
+
+
+def test_story_fallback_keeps_completion_limit():
+    """A story routed to the fast model, first or as a fallback, keeps the quality limit."""
+    router = make_router()
+    assert [tier.max_tokens for tier in router.route("Tell me a story").tiers] == [2000, 2000]
+    assert [tier.max_tokens for tier in router.route("Hello").tiers] == [600, 2000]
+
+    decision = router.route("Tell me a story")
+    router.record_success(decision, decision.primary, 18000, completion_tokens=10)
+    decision = router.route("Tell me a story")
+    assert "unhealthy" in decision.reason
+    assert decision.primary.model == "fast-model"
+    assert decision.primary.max_tokens == 2000
+
+
+def status_error(cls, status: int) -> openai.APIStatusError:
+    """Build an OpenAI status error as raised by the SDK."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return cls("failed", response=httpx.Response(status, request=request), body=None)
+
+
+def test_only_transient_errors_are_retryable():
+    """Timeouts, connection errors, rate limits and 5xx fall back; other 4xx do not."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    assert is_retryable(openai.APITimeoutError(request=request))
+    assert is_retryable(openai.APIConnectionError(request=request))
+    assert is_retryable(status_error(openai.RateLimitError, 429))
+    assert is_retryable(status_error(openai.InternalServerError, 503))
+    assert not is_retryable(status_error(openai.BadRequestError, 400))
+    assert not is_retryable(status_error(openai.PermissionDeniedError, 403))
+    assert not is_retryable(ValueError("bad prompt"))
+
+
+def test_client_error_is_raised_without_fallback():
+    """A rejected request is neither retried on the other model nor held against it."""
+    calls = []
+
+    async def create(model, **kwargs):
+        calls.append(model)
+        raise status_error(openai.BadRequestError, 400)
+
+    store = InMemoryStateStore()
+    service = LLMService(
+        router=make_router(), quotas=QuotaService(store=store), memory=MemoryService(store=store)
+    )
+    completions = SimpleNamespace(create=create)
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(service.generate_response(ChatRequest(user_id="alice", message="Hello")))
+    assert calls == ["fast-model"]
+    assert service.router.is_healthy("fast-model")
+    assert "fast-model" not in service.router.stats
@@ -0,0 +1,127 @@
+"""Quota Service Tests"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+from app.api.deps import get_quota_service, get_voice_service
+from app.db.state_store import InMemoryStateStore
+from app.services import quota_service
+from app.main import app
+from app.services.quota_service import AUDIO_SECONDS, TOKENS, QuotaService
+from app.services.voice_service import VoiceService
+
+
+class FakeClock:
+    """Controllable replacement for time.time."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze time for the quota service."""
+    fake = FakeClock()
+    monkeypatch.setattr(quota_service.time, "time", fake)
+    return fake
+
+
+def make_service(store=None) -> QuotaService:
+    """Create a quota service with a one-hour window in 12 buckets."""
+    return QuotaService(
+        store=store or InMemoryStateStore(),
+        enabled=True,
+        window_seconds=3600,
+        buckets=12,
+        limits={TOKENS: 1000, AUDIO_SECONDS: 60},
+    )
+
+
+def test_usage_is_limited_within_window(clock):
+    """Usage counts against the budget until it slides out of the window."""
+    quotas = make_service()
+    usage = SimpleNamespace(prompt_tokens=400, completion_tokens=200)
+    asyncio.run(quotas.record_tokens("alice", usage))
+    status = asyncio.run(quotas.check("alice"))
+    assert status.remaining == {TOKENS: 400, AUDIO_SECONDS: 60}
+    assert quotas.is_allowed(status)
+
+    clock.now += 1800
+    asyncio.run(quotas.record("alice", TOKENS, 400))
+    status = asyncio.run(quotas.check("alice"))
+    assert not quotas.is_allowed(status)
+    assert status.headers()["X-Quota-Remaining-Tokens"] == "0"
+    assert 0 < int(status.headers()["Retry-After"]) <= 1800
+
+    # The first 600 tokens leave the window an hour after they were used
+    clock.now += 1800
+    assert asyncio.run(quotas.check("alice")).remaining[TOKENS] == 600
+    assert asyncio.run(quotas.check("bob")).remaining[TOKENS] == 1000
+
+
+def test_audio_seconds_are_estimated_from_text(clock):
+    """Synthesized speech is charged by its estimated duration."""
+    quotas = make_service()
+    asyncio.run(quotas.record_speech("alice", "x" * 150))
+    assert asyncio.run(quotas.check("alice")).used[AUDIO_SECONDS] == 10
+
+
+def test_counters_survive_restart(clock, database):
+    """Flushed counters are restored into a fresh state store."""
+    quotas = make_service()
+    asyncio.run(quotas.record("alice", TOKENS, 300))
+    asyncio.run(quotas.record("alice", AUDIO_SECONDS, 5))
+    assert asyncio.run(quotas.flush()) == 2
+    assert asyncio.run(quotas.flush()) == 0
+
+    restarted = make_service()
+    assert asyncio.run(restarted.restore()) == 2
+    assert asyncio.run(restarted.check("alice")).used == {TOKENS: 300, AUDIO_SECONDS: 5}
+
+
+@pytest.fixture
+def voice_client():
+    """Client whose voice requests are synthesized by a fake upstream, with small quotas."""
+    store = InMemoryStateStore()
+    quotas = QuotaService(store=store, enabled=True, limits={TOKENS: 1000, AUDIO_SECONDS: 60})
+    voice = VoiceService(store=store, quotas=quotas)
+
+    async def create(**kwargs):
+        return SimpleNamespace(content=b"mp3-audio")
+
+    voice.client = SimpleNamespace(audio=SimpleNamespace(speech=SimpleNamespace(create=create)))
+
+    async def quota_service():
+        return quotas
+
+    async def voice_service():
+        return voice
+
+    app.dependency_overrides.update(
+        {get_quota_service: quota_service, get_voice_service: voice_service}
+    )
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_voice_headers_include_speech_charge(voice_client):
+    """The remaining audio budget is reported after the synthesized speech is charged."""
+    params = {"text": "x" * 150, "user_id": "alice"}
+    response = voice_client.post("/api/v1/voice/text", params=params)
+    assert response.status_code == 200
+    assert response.headers["X-Quota-Remaining-Audio-Seconds"] == "50"
+
+
+def test_anonymous_voice_requests_are_limited_per_client(voice_client):
+    """Clients without a user_id are charged to their address, not exempted or pooled."""
+    response = voice_client.post("/api/v1/voice/text", params={"text": "x" * 900})
+    assert response.status_code == 200
+    assert response.headers["X-Quota-Remaining-Audio-Seconds"] == "0"
+    assert voice_client.post("/api/v1/voice/text", params={"text": "y"}).status_code == 429
+
+    response = voice_client.post("/api/v1/voice/text", params={"text": "z", "user_id": "alice"})
+    assert response.status_code == 200
+    assert response.headers["X-Quota-Remaining-Audio-Seconds"] == "59"
@@ -0,0 +1,137 @@
+"""Traffic Recording and Replay Tests"""
+import asyncio
+import json
+import time
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.api import deps
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.recorder import (
+    REPLAY_HEADER, RecorderMiddleware, ReplayMiddleware, TrafficRecorder, detached,
+    next_replayed_call, record_upstream,
+)
+from app.main import create_app
+from benchmarks.replay import compare, load_records, replay
+
+
+@pytest.fixture
+def stub_app(tmp_path, monkeypatch):
+    """App recording to a temporary log, served by the upstream stub."""
+    log = tmp_path / "traffic.jsonl"
+    monkeypatch.setattr(settings, "RECORDER_PATH", str(log))
+    monkeypatch.setattr(settings, "UPSTREAM_STUB", True)
+    monkeypatch.setattr(deps, "_llm_service", None)
+    return create_app(), log
+
+
+def test_recorder_captures_redacted_payload_and_upstream_timing(stub_app):
+    """A request is recorded with its payload redacted and its upstream call timed."""
+    app, log = stub_app
+    client = TestClient(app)
+    payload = {"user_id": "alice", "message": "Tell me a story", "context": {"mood": "calm"}}
+    assert client.post("/api/v1/chat", json=payload).status_code == 200
+    client.get("/api/v1/health")
+
+    [record] = load_records([str(log)])
+    assert record["path"] == "/api/v1/chat"
+    assert record["status"] == 200
+    assert record["body"]["message"] == "x" * len(payload["message"])
+    assert record["body"]["user_id"] != "alice"
+    assert record["body"]["context"] == {"mood": "calm"}
+    [call] = record["up"]
+    assert call["n"] == "chat"
+    assert {"ms", "model", "pt", "ct"} <= set(call)
+
+
+def test_replay_reproduces_timing_and_latency(stub_app):
+    """Replayed requests keep their compressed spacing and recorded upstream latency."""
+    app, _ = stub_app
+    body = {"user_id": "u1", "message": "xxxx"}
+    records = [
+        {"ts": 100.0 + index, "method": "POST", "path": "/api/v1/chat", "query": "",
+         "ctype": "application/json", "size": 40, "body": body, "status": 200, "ms": 120.0,
+         "resp": 100, "up": [{"n": "chat", "ms": 100.0, "pt": 50, "ct": 20}]}
+        for index in range(3)
+    ]
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+            return await replay(records, client, speed=10)
+
+    results = asyncio.run(run())
+    assert [result["status"] for result in results] == [200, 200, 200]
+    # Recorded upstream latency is reproduced by the stub
+    assert all(result["ms"] >= 100 for result in results)
+    # One second between recorded arrivals, compressed tenfold. Requests are never
+    # sent early, but a busy loop may send them late, so only the lower bound is checked
+    offsets = [result["offset_ms"] for result in results]
+    assert offsets == sorted(offsets)
+    assert all(offset >= index * 90 for index, offset in enumerate(offsets))
+
+    report = compare(results, [dict(result, ms=result["ms"] / 2) for result in results])
+    assert "p99_ms" in report and "-50.0%" in report
+
+
+def test_background_work_is_recorded_separately(tmp_path):
+    """Detached work neither joins the request's record nor takes its replayed calls."""
+    log = tmp_path / "traffic.jsonl"
+    recorder = TrafficRecorder(str(log))
+    tasks = []
+    replayed = []
+
+    async def background():
+        replayed.append(next_replayed_call("chat"))
+        await asyncio.sleep(0)
+        record_upstream("speculation", time.perf_counter(), model="gpt-4")
+
+    async def endpoint(scope, receive, send):
+        record_upstream("chat", time.perf_counter(), model="gpt-4")
+        tasks.append(asyncio.create_task(detached(background())))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    app = RecorderMiddleware(ReplayMiddleware(endpoint), recorder)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+            headers = {REPLAY_HEADER: '[{"n": "chat", "ms": 1}]'}
+            assert (await client.get("/api/v1/story", headers=headers)).status_code == 200
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    recorder.close()
+    request, work = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [call["n"] for call in request["up"]] == ["chat"]
+    assert work["bg"] and [call["n"] for call in work["up"]] == ["speculation"]
+    assert replayed == [None]
+    assert load_records([str(log)]) == [request]
+
+
+def test_failed_calls_are_replayed_as_failures(stub_app):
+    """A recorded fallback replays as a failure followed by the call that served the reply."""
+    app, _ = stub_app
+    plan = [
+        {"n": "chat", "ms": 60.0, "ok": False, "status": 503},
+        {"n": "chat", "ms": 20.0, "pt": 5, "ct": 5},
+    ]
+    fallbacks = metrics.get("router.fallbacks")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/v1/chat", json={"user_id": "u1", "message": "xxxx"},
+                headers={REPLAY_HEADER: json.dumps(plan)},
+            )
+            return response, (time.perf_counter() - start) * 1000
+
+    response, elapsed_ms = asyncio.run(run())
+    assert response.status_code == 200
+    assert response.json()["message"] == "x" * 20
+    assert elapsed_ms >= 80
+    assert metrics.get("router.fallbacks") == fallbacks + 1
@@ -0,0 +1,173 @@
+"""Speculative Follow-up Tests"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.core.metrics import metrics
+from app.db.state_store import InMemoryStateStore
+from app.models.chat import ChatRequest
+from app.services.llm_service import LLMService
+from app.services.memory_service import MemoryService
+from app.services.quota_service import AUDIO_SECONDS, QuotaService
+from app.services.speculation_service import SpeculationService, match_follow_up
+from app.services.voice_service import VoiceService
+
+
+class FakeCompletions:
+    """Completions API recording the user message of each call."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, model, messages, temperature, max_tokens):
+        self.calls.append(messages[-1]["content"])
+        message = SimpleNamespace(content=f"reply {len(self.calls)}")
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=message)],
+            usage=SimpleNamespace(
+                prompt_tokens=100, completion_tokens=50, prompt_tokens_details=None
+            ),
+        )
+
+
+pytestmark = pytest.mark.usefixtures("database")
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    """Start and end each test with empty metrics."""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def make_service(budget=20000):
+    """Create an LLM service with speculation enabled and a fake upstream."""
+    store = InMemoryStateStore()
+    service = LLMService(
+        quotas=QuotaService(store=store),
+        memory=MemoryService(store=store),
+        speculation=SpeculationService(store=store, enabled=True, user_tokens_per_hour=budget),
+    )
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    return service
+
+
+def chat(message, user_id="alice"):
+    """Build a request in conversation "conv"."""
+    return ChatRequest(user_id=user_id, message=message, conversation_id="conv")
+
+
+async def speculations_done(service):
+    """Wait for the speculations started so far to finish."""
+    await asyncio.gather(*service.speculation._tasks)
+
+
+def test_follow_ups_are_normalized():
+    """Follow-ups match regardless of case, punctuation and spacing."""
+    assert match_follow_up("Tell me more!") == "more"
+    assert match_follow_up("  what happened NEXT? ") == "next"
+    assert match_follow_up("Tell me more about the lion") is None
+
+
+def test_matching_follow_up_is_served_from_speculation():
+    """A predicted follow-up is answered without another upstream call."""
+    async def scenario():
+        service = make_service()
+        await service.generate_response(chat("Tell me a story about Sundiata"))
+        await speculations_done(service)
+        response = await service.generate_response(chat("Tell me more!"))
+        await speculations_done(service)
+        _, history = await service.memory.get_conversation("conv", "alice")
+        return service, response, history
+
+    service, response, history = asyncio.run(scenario())
+    assert response.message == "reply 2"
+    # The follow-up itself never went upstream: its reply was speculated after
+    # the story, and the last call anticipates the next follow-up
+    assert service.client.chat.completions.calls == [
+        "Tell me a story about Sundiata", "Tell me more.", "Tell me more.",
+    ]
+    assert history[-2:] == [
+        {"role": "user", "content": "Tell me more!"},
+        {"role": "assistant", "content": "reply 2"},
+    ]
+    assert metrics.get("speculation.hits") == 1
+    assert metrics.snapshot()["speculation.hit_rate"] == 0.5
+
+
+def test_unmatched_speculation_is_discarded():
+    """Another message discards the speculation and reports its spend as wasted."""
+    async def scenario():
+        service = make_service()
+        await service.generate_response(chat("Tell me a story about Sundiata"))
+        await speculations_done(service)
+        return await service.generate_response(chat("Who was his mother?"))
+
+    response = asyncio.run(scenario())
+    assert response.message == "reply 3"
+    assert metrics.get("speculation.discarded") == 1
+    assert metrics.get("speculation.wasted_tokens") == 150
+    assert metrics.snapshot()["speculation.waste_rate"] == 1.0
+
+
+def test_speculation_respects_user_budget():
+    """Nothing is precomputed once the user's speculation budget is spent."""
+    async def scenario():
+        service = make_service(budget=100)
+        await service.generate_response(chat("Tell me a story about Sundiata"))
+        await speculations_done(service)
+        await service.generate_response(chat("What happened next?"))
+        await speculations_done(service)
+        return service
+
+    service = asyncio.run(scenario())
+    assert len(service.client.chat.completions.calls) == 3
+    assert metrics.get("speculation.skipped_budget") == 1
+
+
+def test_speculation_is_scoped_by_owner():
+    """Another user reusing the conversation ID is not served alice's speculation."""
+    async def scenario():
+        service = make_service()
+        await service.generate_response(chat("Tell me a story about Sundiata"))
+        await speculations_done(service)
+        stolen = await service.generate_response(chat("Tell me more!", user_id="bob"))
+        hits = metrics.get("speculation.hits")
+        served = await service.generate_response(chat("Tell me more!"))
+        return stolen, hits, served
+
+    stolen, hits, served = asyncio.run(scenario())
+    assert stolen.message == "reply 3"
+    assert hits == 0
+    assert served.message == "reply 2"
+    assert metrics.get("speculation.hits") == 1
+
+
+def test_speculated_speech_is_charged_when_fetched():
+    """Speculated speech is charged when the user fetches it, not when the text is served."""
+    upstream = []
+
+    async def create(**kwargs):
+        upstream.append(kwargs["input"])
+        return SimpleNamespace(content=b"mp3-audio")
+
+    async def scenario():
+        service = make_service()
+        voice = VoiceService(store=service.memory.store, quotas=service.quotas)
+        voice.client = SimpleNamespace(audio=SimpleNamespace(speech=SimpleNamespace(create=create)))
+        service.speculation.tts = voice.prepare_speech
+        await service.generate_response(chat("Tell me a story about Sundiata"))
+        await speculations_done(service)
+        reply = await service.generate_response(chat("Tell me more!"))
+        served = await service.quotas.check("alice")
+        await voice.text_to_speech(reply.message, user_id="alice")
+        fetched = await service.quotas.check("alice")
+        await voice.text_to_speech(reply.message, user_id="alice")
+        again = await service.quotas.check("alice")
+        return served, fetched, again
+
+    served, fetched, again = asyncio.run(scenario())
+    assert upstream[0] == "reply 2"
+    assert served.used[AUDIO_SECONDS] == 0
+    assert fetched.used[AUDIO_SECONDS] == 1
+    assert again.used[AUDIO_SECONDS] == 1
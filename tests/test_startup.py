@@ -0,0 +1,50 @@
+"""Startup and Cold Start Tests"""
+import subprocess
+import sys
+import time
+from pathlib import Path
+from fastapi.testclient import TestClient
+from app.main import create_app
+
+# Budget for `import app.main` in a fresh interpreter. New pods must take
+# traffic within a second or two, and most of that goes to FastAPI itself.
+IMPORT_BUDGET_SECONDS = 2.0
+
+# Modules that must only be imported when a service is first built
+DEFERRED_MODULES = ["openai", "sqlalchemy"]
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROFILE_SCRIPT = f"""
+import sys, time
+start = time.perf_counter()
+import app.main
+print(time.perf_counter() - start)
+print(",".join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))
+"""
+
+
+def test_cold_import_within_budget():
+    """Importing the app is fast and defers heavy dependencies."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROFILE_SCRIPT],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    elapsed, loaded = result.stdout.splitlines()[-2:]
+    assert float(elapsed) < IMPORT_BUDGET_SECONDS, f"cold import took {elapsed}s"
+    assert loaded == "", f"eagerly imported: {loaded}"
+
+
+def test_readiness_follows_warm_up(database):
+    """Liveness answers at once; readiness turns green after warm-up."""
+    app = create_app()
+    client = TestClient(app)
+    assert client.get("/api/v1/health").status_code == 200
+    assert client.get("/api/v1/ready").status_code == 503
+
+    with TestClient(app) as started:
+        for _ in range(100):
+            if started.get("/api/v1/ready").status_code == 200:
+                break
+            time.sleep(0.05)
+        assert started.get("/api/v1/ready").json() == {"ready": True}
@@ -0,0 +1,136 @@
+"""Shared State Store Tests"""
+import asyncio
+import multiprocessing
+import threading
+import pytest
+from app.db.state_store import InMemoryStateStore, SQLiteStateStore
+from app.services.memory_service import MemoryService
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """Provide each state store backend."""
+    if request.param == "memory":
+        yield InMemoryStateStore()
+    else:
+        store = SQLiteStateStore(str(tmp_path / "state.db"))
+        yield store
+        store.close()
+
+
+def test_values_and_expiry(store):
+    """Values can be set, added once, expired and deleted."""
+    async def scenario():
+        await store.set("a", b"1")
+        assert await store.get("a") == b"1"
+        assert await store.add("a", b"2") is False
+        assert await store.add("b", b"2") is True
+        await store.set("gone", b"x", ttl=-1)
+        assert await store.get("gone") is None
+        assert await store.get_many(["a", "missing", "b"]) == [b"1", None, b"2"]
+        await store.delete("a")
+        assert await store.get("a") is None
+
+    asyncio.run(scenario())
+
+
+def test_counters(store):
+    """Counters increment atomically and restart after expiry."""
+    async def scenario():
+        assert await store.incr("n") == 1
+        assert await store.incr("n", 4) == 5
+        await store.set("old", b"7", ttl=-1)
+        assert await store.incr("old") == 1
+
+    asyncio.run(scenario())
+
+
+def test_expiry_can_be_reset(store):
+    """A live value's expiry can be reset; expired and missing values stay gone."""
+    async def scenario():
+        await store.set("live", b"1", ttl=60)
+        await store.set("gone", b"2", ttl=-1)
+        assert await store.expire("live", 3600) is True
+        assert await store.expire("gone", 3600) is False
+        assert await store.expire("missing", 3600) is False
+        return await store.get_many(["live", "gone"])
+
+    assert asyncio.run(scenario()) == [b"1", None]
+
+
+def test_lists_are_bounded(store):
+    """Lists keep only the most recent items."""
+    async def scenario():
+        for i in range(5):
+            await store.list_push("l", str(i).encode(), max_len=3)
+        assert await store.list_range("l") == [b"2", b"3", b"4"]
+
+    asyncio.run(scenario())
+
+
+def test_short_term_memory_is_per_user(store):
+    """Short-term memory is bounded per user, not globally."""
+    async def scenario():
+        memory = MemoryService(store)
+        for i in range(12):
+            await memory.add_short_term_memory("alice", f"turn {i}")
+        await memory.add_short_term_memory("bob", "hello")
+        alice = await memory.get_short_term_memory("alice")
+        assert len(alice) == memory.max_short_term
+        assert alice[-1]["content"] == "turn 11"
+        assert [m["content"] for m in await memory.get_short_term_memory("bob")] == ["hello"]
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_lock_wait_does_not_block_event_loop(tmp_path):
+    """A write waiting on another worker's lock leaves the event loop free."""
+    path = str(tmp_path / "locked.db")
+    store = SQLiteStateStore(path)
+    locked, release = threading.Event(), threading.Event()
+
+    def hold_write_lock():
+        other = SQLiteStateStore(path)
+        with other._transaction():
+            locked.set()
+            release.wait(5)
+        other.close()
+
+    async def scenario():
+        holder = threading.Thread(target=hold_write_lock)
+        holder.start()
+        locked.wait(5)
+        write = asyncio.create_task(store.set("k", b"v"))
+        # The loop keeps running other work while the write waits for the lock
+        await asyncio.sleep(0.1)
+        assert not write.done()
+        release.set()
+        await write
+        holder.join()
+
+    asyncio.run(scenario())
+    assert asyncio.run(store.get("k")) == b"v"
+    store.close()
+
+
+def _increment(path: str, times: int) -> None:
+    """Increment a shared counter from another process."""
+    async def run():
+        for _ in range(times):
+            await store.incr("shared")
+
+    store = SQLiteStateStore(path)
+    asyncio.run(run())
+    store.close()
+
+
+def test_sqlite_store_is_shared_across_processes(tmp_path):
+    """Concurrent workers see and update the same counters."""
+    path = str(tmp_path / "shared.db")
+    SQLiteStateStore(path).close()
+    workers = [multiprocessing.Process(target=_increment, args=(path, 50)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert asyncio.run(SQLiteStateStore(path).get("shared")) == b"200"